@@ -14,7 +14,10 @@ from db.dictionary_model import *  # noqa
 from db.plans_model import *  # noqa
 from db.credits_model import *  # noqa
 from db.payments_model import *  # noqa
-
+from db.rollups_model import *  # noqa
+from db.credit_balances_model import *  # noqa
+from db.data_generation_model import *  # noqa
+from db.plan_upload_job_model import *  # noqa
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
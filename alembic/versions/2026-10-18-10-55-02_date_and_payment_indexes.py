@@ -0,0 +1,57 @@
+"""date_and_payment_indexes
+
+Revision ID: 4c1f9e2a7b3d
+Revises: 78990858e670
+Create Date: 2026-10-18 10:55:02.318274
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "4c1f9e2a7b3d"
+down_revision: Union[str, Sequence[str], None] = "78990858e670"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.create_index(
+        "ix_credits_issuance_date_body",
+        "credits",
+        ["issuance_date", "body"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_payments_payment_date_sum",
+        "payments",
+        ["payment_date", "sum"],
+        unique=False,
+    )
+    # MySQL silently drops the implicit `credit_id` FK index once this one exists
+    op.create_index(
+        "ix_payments_credit_id_type_id_sum",
+        "payments",
+        ["credit_id", "type_id", "sum"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_plans_period_category_id",
+        "plans",
+        ["period", "category_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.drop_index("ix_plans_period_category_id", table_name="plans")
+    # the credit_id foreign key needs an index to survive the drop below
+    op.create_index("credit_id", "payments", ["credit_id"], unique=False)
+    op.drop_index("ix_payments_credit_id_type_id_sum", table_name="payments")
+    op.drop_index("ix_payments_payment_date_sum", table_name="payments")
+    op.drop_index("ix_credits_issuance_date_body", table_name="credits")
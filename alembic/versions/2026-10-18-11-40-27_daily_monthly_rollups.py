@@ -0,0 +1,76 @@
+"""daily_monthly_rollups
+
+Revision ID: 9e3b6d0c5a21
+Revises: 4c1f9e2a7b3d
+Create Date: 2026-10-18 11:40:27.905113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "9e3b6d0c5a21"
+down_revision: Union[str, Sequence[str], None] = "4c1f9e2a7b3d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.create_table(
+        "daily_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("issuance_count", sa.BigInteger(), nullable=False),
+        sa.Column("issuance_sum", sa.DECIMAL(precision=16, scale=2), nullable=False),
+        sa.Column("collection_count", sa.BigInteger(), nullable=False),
+        sa.Column("collection_sum", sa.DECIMAL(precision=16, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+    op.create_table(
+        "monthly_rollups",
+        sa.Column("year", sa.SmallInteger(), nullable=False),
+        sa.Column("month", sa.SmallInteger(), nullable=False),
+        sa.Column("issuance_count", sa.BigInteger(), nullable=False),
+        sa.Column("issuance_sum", sa.DECIMAL(precision=16, scale=2), nullable=False),
+        sa.Column("collection_count", sa.BigInteger(), nullable=False),
+        sa.Column("collection_sum", sa.DECIMAL(precision=16, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint("year", "month"),
+    )
+
+    # backfill from the existing ledger, same as `python -m loader.rebuild_rollups`
+    op.execute("""
+        INSERT INTO daily_rollups
+            (day, issuance_count, issuance_sum, collection_count, collection_sum)
+        SELECT day, SUM(issuance_count), SUM(issuance_sum),
+               SUM(collection_count), SUM(collection_sum)
+        FROM (
+            SELECT issuance_date AS day, COUNT(id) AS issuance_count,
+                   COALESCE(SUM(body), 0) AS issuance_sum,
+                   0 AS collection_count, 0 AS collection_sum
+            FROM credits GROUP BY issuance_date
+            UNION ALL
+            SELECT payment_date, 0, 0, COUNT(id), SUM(sum)
+            FROM payments GROUP BY payment_date
+        ) AS by_day
+        GROUP BY day
+        """)
+    op.execute("""
+        INSERT INTO monthly_rollups
+            (year, month, issuance_count, issuance_sum,
+             collection_count, collection_sum)
+        SELECT EXTRACT(YEAR FROM day), EXTRACT(MONTH FROM day),
+               SUM(issuance_count), SUM(issuance_sum),
+               SUM(collection_count), SUM(collection_sum)
+        FROM daily_rollups
+        GROUP BY EXTRACT(YEAR FROM day), EXTRACT(MONTH FROM day)
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.drop_table("monthly_rollups")
+    op.drop_table("daily_rollups")
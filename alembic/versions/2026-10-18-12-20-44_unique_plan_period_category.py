@@ -0,0 +1,40 @@
+"""unique_plan_period_category
+
+Revision ID: 2b7e4f91c3d8
+Revises: 9e3b6d0c5a21
+Create Date: 2026-10-18 12:20:44.905113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "2b7e4f91c3d8"
+down_revision: Union[str, Sequence[str], None] = "9e3b6d0c5a21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.drop_index("ix_plans_period_category_id", table_name="plans")
+    op.create_index(
+        "ix_plans_period_category_id",
+        "plans",
+        ["period", "category_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.drop_index("ix_plans_period_category_id", table_name="plans")
+    op.create_index(
+        "ix_plans_period_category_id",
+        "plans",
+        ["period", "category_id"],
+        unique=False,
+    )
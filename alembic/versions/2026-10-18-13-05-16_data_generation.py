@@ -0,0 +1,35 @@
+"""data_generation
+
+Revision ID: 7d4a0c6e18f2
+Revises: 2b7e4f91c3d8
+Create Date: 2026-10-18 13:05:16.447120
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "7d4a0c6e18f2"
+down_revision: Union[str, Sequence[str], None] = "2b7e4f91c3d8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    data_generation = op.create_table(
+        "data_generation",
+        sa.Column("id", sa.SmallInteger(), nullable=False),
+        sa.Column("generation", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.bulk_insert(data_generation, [{"id": 1, "generation": 0}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.drop_table("data_generation")
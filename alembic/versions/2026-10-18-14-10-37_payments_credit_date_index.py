@@ -0,0 +1,41 @@
+"""payments_credit_date_index
+
+Revision ID: 5e8a2d1f7c94
+Revises: 7d4a0c6e18f2
+Create Date: 2026-10-18 14:10:37.502913
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "5e8a2d1f7c94"
+down_revision: Union[str, Sequence[str], None] = "7d4a0c6e18f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    # covers payments up to a date per credit, created first so the FK keeps an index
+    op.create_index(
+        "ix_payments_credit_id_type_id_date_sum",
+        "payments",
+        ["credit_id", "type_id", "payment_date", "sum"],
+        unique=False,
+    )
+    op.drop_index("ix_payments_credit_id_type_id_sum", table_name="payments")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.create_index(
+        "ix_payments_credit_id_type_id_sum",
+        "payments",
+        ["credit_id", "type_id", "sum"],
+        unique=False,
+    )
+    op.drop_index("ix_payments_credit_id_type_id_date_sum", table_name="payments")
@@ -0,0 +1,49 @@
+"""plan_upload_jobs
+
+Revision ID: 3a9c5f0e2b67
+Revises: 5e8a2d1f7c94
+Create Date: 2026-10-18 14:52:09.117436
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "3a9c5f0e2b67"
+down_revision: Union[str, Sequence[str], None] = "5e8a2d1f7c94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.create_table(
+        "plan_upload_jobs",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=True),
+        sa.Column("path", sa.String(length=512), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("total_rows", sa.Integer(), nullable=True),
+        sa.Column("processed_rows", sa.Integer(), nullable=False),
+        sa.Column("inserted_rows", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_plan_upload_jobs_status"),
+        "plan_upload_jobs",
+        ["status"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.drop_index(op.f("ix_plan_upload_jobs_status"), table_name="plan_upload_jobs")
+    op.drop_table("plan_upload_jobs")
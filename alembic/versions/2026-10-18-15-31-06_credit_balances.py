@@ -0,0 +1,51 @@
+"""credit_balances
+
+Revision ID: 8b1d4f7a2c60
+Revises: 3a9c5f0e2b67
+Create Date: 2026-10-18 15:31:06.214587
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "8b1d4f7a2c60"
+down_revision: Union[str, Sequence[str], None] = "3a9c5f0e2b67"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.create_table(
+        "credit_balances",
+        sa.Column("credit_id", sa.BigInteger(), nullable=False),
+        sa.Column("total_paid", sa.DECIMAL(precision=16, scale=2), nullable=False),
+        sa.Column("body_paid", sa.DECIMAL(precision=16, scale=2), nullable=False),
+        sa.Column("percent_paid", sa.DECIMAL(precision=16, scale=2), nullable=False),
+        sa.Column("last_payment_date", sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(["credit_id"], ["credits.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("credit_id"),
+    )
+
+    # backfill from the existing ledger, same as `python -m loader.rebuild_balances`
+    op.execute("""
+        INSERT INTO credit_balances
+            (credit_id, total_paid, body_paid, percent_paid, last_payment_date)
+        SELECT p.credit_id, SUM(p.sum),
+               COALESCE(SUM(CASE WHEN d.name = 'тіло' THEN p.sum END), 0),
+               COALESCE(SUM(CASE WHEN d.name = 'відсотки' THEN p.sum END), 0),
+               MAX(p.payment_date)
+        FROM payments AS p
+        JOIN dictionary AS d ON d.id = p.type_id
+        GROUP BY p.credit_id
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.drop_table("credit_balances")
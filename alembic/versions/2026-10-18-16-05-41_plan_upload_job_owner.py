@@ -0,0 +1,35 @@
+"""plan_upload_job_owner
+
+Revision ID: 6f2c8e1a9d35
+Revises: 8b1d4f7a2c60
+Create Date: 2026-10-18 16:05:41.336702
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "6f2c8e1a9d35"
+down_revision: Union[str, Sequence[str], None] = "8b1d4f7a2c60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.add_column(
+        "plan_upload_jobs", sa.Column("owner", sa.String(length=64), nullable=True)
+    )
+    op.add_column(
+        "plan_upload_jobs", sa.Column("heartbeat_at", sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.drop_column("plan_upload_jobs", "heartbeat_at")
+    op.drop_column("plan_upload_jobs", "owner")
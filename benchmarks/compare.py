@@ -0,0 +1,81 @@
+"""
+Compares two benchmark result files and exits non-zero on regressions.
+
+    python -m benchmarks.compare benchmarks/results/<base>.json benchmarks/results/<new>.json
+"""
+
+import argparse
+import json
+import sys
+
+LATENCY_KEYS = ("p50", "p90", "p99")
+
+
+def change(base: float, new: float) -> float:
+    return (new - base) / base * 100 if base else 0.0
+
+
+def compare(base: dict, new: dict, threshold: float) -> list[str]:
+    regressions = []
+    print(
+        f"base {base['commit']} (x{base['scale']})  ->  new {new['commit']} (x{new['scale']})"
+    )
+    if base["scale"] != new["scale"]:
+        print("warning: results were taken at different scales")
+
+    for name, new_result in new["results"].items():
+        base_result = base["results"].get(name)
+        if base_result is None:
+            print(f"{name:<20} new scenario")
+            continue
+
+        if name == "import_all":
+            rows = [("seconds", base_result["seconds"], new_result["seconds"])]
+        else:
+            rows = [
+                (key, base_result["latency_ms"][key], new_result["latency_ms"][key])
+                for key in LATENCY_KEYS
+            ]
+            base_queries = (base_result.get("queries_per_request") or {}).get("max")
+            new_queries = (new_result.get("queries_per_request") or {}).get("max")
+            if base_queries is not None and new_queries is not None:
+                rows.append(("max queries", base_queries, new_queries))
+        rows.append(
+            ("peak rss mb", base_result["peak_rss_mb"], new_result["peak_rss_mb"])
+        )
+
+        for key, base_value, new_value in rows:
+            delta = change(base_value, new_value)
+            flag = ""
+            if delta > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} {key}")
+            print(
+                f"{name:<20} {key:<12} {base_value:>12.2f} {new_value:>12.2f} "
+                f"{delta:>+8.1f}%{flag}"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="allowed slowdown, percent"
+    )
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    regressions = compare(base, new, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Endpoint and loader benchmarks, run in-process against the configured database.
+
+    python -m benchmarks.run --scale 100 --seed
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+`--seed` TRUNCATES every data table and re-imports `test_data` scaled `--scale`
+times, so only point it at a disposable database. With more than one scenario
+selected every scenario runs in an interpreter of its own, so its `peak_rss_mb`
+does not depend on the scenarios before it.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable
+
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy import delete, func, select
+
+from benchmarks.seed import reset_database, write_scaled_data
+from core.cache import result_cache
+from db.connection import async_session_maker
+from db.credits_model import Credit
+from db.payments_model import Payment
+from db.plans_model import Plan
+from db.rollups_model import MonthlyRollup
+from db.users_model import User
+from loader.data_loader import DataLoader
+from logs.config.logging_config import logger
+from main import app
+from repo.data_generation_repo import DataGenerationRepo
+
+BENCH_DATA_DIR = ".bench_data"
+RESULTS_DIR = os.path.join("benchmarks", "results")
+# /plans_insert needs fresh (period, category) pairs for every request
+UPLOAD_FIRST_YEAR = 2200
+SCENARIOS = (
+    "user_credits",
+    "plans_performance",
+    "year_performance",
+    "portfolio_aging",
+    "plans_insert",
+)
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+RequestFactory = Callable[[AsyncClient, int], Awaitable[Response]]
+
+
+def peak_rss_mb() -> float:
+    # peak of the whole process; ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if platform.system() == "Darwin" else peak / 1024
+
+
+def percentiles(values: list[float]) -> dict:
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "p50": cuts[49],
+        "p90": cuts[89],
+        "p99": cuts[98],
+        "max": max(values),
+        "mean": statistics.fmean(values),
+    }
+
+
+async def measure(
+    client: AsyncClient,
+    make_request: RequestFactory,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict:
+    for i in range(requests, requests + warmup):
+        await make_request(client, i)
+
+    latencies: list[float] = []
+    queries: list[int] = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with slots:
+            started = time.perf_counter()
+            response = await make_request(client, i)
+            latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+        found = QUERIES_RE.search(response.headers.get("server-timing", ""))
+        if found:
+            queries.append(int(found.group(1)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": requests / elapsed,
+        "latency_ms": percentiles(latencies),
+        "queries_per_request": (
+            {"mean": statistics.fmean(queries), "max": max(queries)}
+            if queries
+            else None
+        ),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def bench_import(data_dir: str) -> dict:
+    await reset_database()
+    started = time.perf_counter()
+    await DataLoader(data_dir=data_dir).import_all()
+    elapsed = time.perf_counter() - started
+    async with async_session_maker() as session:
+        rows = 0
+        for model_cls in (User, Credit, Payment):
+            rows += await session.scalar(select(func.count()).select_from(model_cls))
+    return {
+        "seconds": elapsed,
+        "rows": rows,
+        "rows_per_second": rows / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def load_samples(rng: random.Random) -> dict:
+    async with async_session_maker() as session:
+        user_ids = (
+            await session.scalars(select(Credit.user_id).distinct().limit(1000))
+        ).all()
+        first_day, last_day = (
+            await session.execute(
+                select(func.min(Credit.issuance_date), func.max(Credit.issuance_date))
+            )
+        ).one()
+        years = (await session.scalars(select(MonthlyRollup.year).distinct())).all()
+    if not user_ids or not years:
+        raise SystemExit("The database is empty, run with --seed first")
+    span = (last_day - first_day).days
+    return {
+        "user_ids": [rng.choice(user_ids) for _ in range(1000)],
+        "dates": [
+            first_day + timedelta(days=rng.randint(0, span)) for _ in range(1000)
+        ],
+        "years": list(years),
+    }
+
+
+def plan_upload(i: int) -> bytes:
+    year = UPLOAD_FIRST_YEAR + i
+    lines = ["місяць плану,назва категорії плану,сума"]
+    for month in range(1, 13):
+        for category_id in (3, 4):
+            lines.append(f"{date(year, month, 1)},{category_id},{1000 * month}")
+    return "\n".join(lines).encode()
+
+
+async def drop_uploaded_plans() -> None:
+    async with async_session_maker() as session:
+        await session.execute(
+            delete(Plan).where(Plan.period >= date(UPLOAD_FIRST_YEAR, 1, 1))
+        )
+        await DataGenerationRepo(session).bump()
+        await session.commit()
+
+
+def scenarios(samples: dict) -> dict[str, RequestFactory]:
+    user_ids, dates, years = samples["user_ids"], samples["dates"], samples["years"]
+
+    def pick(values: list, i: int):
+        return values[i % len(values)]
+
+    return {
+        "user_credits": lambda client, i: client.get(
+            f"/user_credits/{pick(user_ids, i)}"
+        ),
+        "plans_performance": lambda client, i: client.get(
+            "/plans_performance",
+            params={"target_date": pick(dates, i).isoformat()},
+        ),
+        "year_performance": lambda client, i: client.get(
+            "/year_performance", params={"target_year": pick(years, i)}
+        ),
+        "portfolio_aging": lambda client, i: client.get(
+            "/portfolio/aging", params={"as_of": pick(dates, i).isoformat()}
+        ),
+        "plans_insert": lambda client, i: client.post(
+            "/plans_insert",
+            files={"file": ("plans.csv", io.BytesIO(plan_upload(i)), "text/csv")},
+        ),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_isolated(args: argparse.Namespace, name: str) -> dict:
+    """Runs one scenario in a fresh interpreter and returns its results."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "results.json")
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.run",
+            "--scale",
+            str(args.scale),
+            "--only",
+            name,
+            "--requests",
+            str(args.requests),
+            "--concurrency",
+            str(args.concurrency),
+            "--warmup",
+            str(args.warmup),
+            "--random-seed",
+            str(args.random_seed),
+            "--output",
+            output,
+        ]
+        if args.cache:
+            command.append("--cache")
+        process = await asyncio.create_subprocess_exec(*command)
+        if await process.wait() != 0:
+            raise SystemExit(f"Scenario {name} failed with code {process.returncode}")
+        with open(output) as f:
+            return json.load(f)["results"][name]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.random_seed)
+    results: dict = {}
+    if args.seed:
+        data_dir = write_scaled_data(
+            args.scale, os.path.join(BENCH_DATA_DIR, f"x{args.scale}")
+        )
+        results["import_all"] = await bench_import(data_dir)
+        logger.info(f"import_all: {results['import_all']}")
+
+    names = args.only or SCENARIOS
+    if len(names) > 1:
+        for name in names:
+            results[name] = await run_isolated(args, name)
+            logger.info(f"{name}: {results[name]['latency_ms']}")
+        return results
+
+    result_cache.enabled = args.cache
+    samples = await load_samples(rng)
+    selected = {name: scenarios(samples)[name] for name in names}
+
+    if "plans_insert" in selected:
+        # leftovers of an interrupted run would turn every upload into a 409
+        await drop_uploaded_plans()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        try:
+            for name, make_request in selected.items():
+                results[name] = await measure(
+                    client, make_request, args.requests, args.concurrency, args.warmup
+                )
+                logger.info(f"{name}: {results[name]['latency_ms']}")
+        finally:
+            if "plans_insert" in selected:
+                await drop_uploaded_plans()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="copies of test_data")
+    parser.add_argument(
+        "--seed", action="store_true", help="truncate, then import scaled data"
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument(
+        "--cache", action="store_true", help="keep the result cache enabled"
+    )
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS)
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--output", help="defaults to benchmarks/results/")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "scale": args.scale,
+        "cache": args.cache,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"{datetime.now():%Y%m%d-%H%M%S}-{commit}-x{args.scale}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Benchmark results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import pandas as pd
+from sqlalchemy import text
+
+from db.connection import async_session_maker
+from logs.config.logging_config import logger
+
+SOURCE_DIR = "test_data"
+# table -> columns shifted by the copy offset, keyed by the table their ids come from
+ID_COLUMNS = {
+    "users.csv": {"id": "users.csv"},
+    "credits.csv": {"id": "credits.csv", "user_id": "users.csv"},
+    "payments.csv": {"id": "payments.csv", "credit_id": "credits.csv"},
+}
+COPIED_AS_IS = ("dictionary.csv", "plans.csv")
+RESET_TABLES = (
+    "credit_balances",
+    "payments",
+    "credits",
+    "plans",
+    "users",
+    "dictionary",
+    "daily_rollups",
+    "monthly_rollups",
+)
+
+
+def write_scaled_data(scale: int, out_dir: str, source_dir: str = SOURCE_DIR) -> str:
+    """
+    Writes `scale` copies of the fixtures with shifted ids into `out_dir`, one copy
+    at a time so 1000x never has to fit in memory. Dates and sums are unchanged,
+    every aggregate simply grows `scale` times. Plans and dictionaries are copied
+    once since (period, category) is unique.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    frames = {
+        filename: pd.read_csv(os.path.join(source_dir, filename), sep="\t", dtype=str)
+        for filename in ID_COLUMNS
+    }
+    max_ids = {
+        filename: int(df["id"].astype(int).max()) for filename, df in frames.items()
+    }
+
+    for filename in COPIED_AS_IS:
+        shutil.copy(os.path.join(source_dir, filename), os.path.join(out_dir, filename))
+
+    for filename, df in frames.items():
+        path = os.path.join(out_dir, filename)
+        for copy in range(scale):
+            scaled = df.copy()
+            for column, id_source in ID_COLUMNS[filename].items():
+                scaled[column] = df[column].astype(int) + copy * max_ids[id_source]
+            if filename == "users.csv" and copy:
+                scaled["login"] = df["login"] + f"_{copy}"
+            scaled.to_csv(
+                path,
+                sep="\t",
+                index=False,
+                header=copy == 0,
+                mode="w" if copy == 0 else "a",
+            )
+        logger.info(f"Wrote {len(df) * scale} rows to {path}")
+    return out_dir
+
+
+async def reset_database() -> None:
+    """Empties every data table, the loader then imports into a clean schema."""
+    async with async_session_maker() as session:
+        await session.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+        for table in RESET_TABLES:
+            await session.execute(text(f"TRUNCATE TABLE {table}"))
+        await session.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+        await session.commit()
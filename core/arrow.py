@@ -0,0 +1,31 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, Literal
+
+import pyarrow as pa
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# continuation marker followed by a zero metadata length
+END_OF_STREAM = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+ResponseFormat = Literal["json", "arrow"]
+
+
+def to_ipc_stream(schema: pa.Schema, rows: Iterable[dict]) -> bytes:
+    """Rows as one Arrow IPC stream, readable with `pyarrow.ipc.open_stream`."""
+    table = pa.Table.from_pylist(list(rows), schema=schema)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+async def ipc_stream(
+    schema: pa.Schema, batches: AsyncIterable[pa.RecordBatch]
+) -> AsyncIterator[bytes]:
+    """
+    The messages of an Arrow IPC stream one at a time, so a response starts with the
+    schema and sends every record batch as soon as it is built.
+    """
+    yield schema.serialize().to_pybytes()
+    async for batch in batches:
+        yield batch.serialize().to_pybytes()
+    yield END_OF_STREAM
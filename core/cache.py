@@ -0,0 +1,106 @@
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from core.config import settings
+
+T = TypeVar("T")
+
+
+class LocalCache:
+    """In-process LRU with per-entry expiry, `ttl=None` keeps an entry until evicted."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[Optional[float], Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int]) -> None:
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class RedisCache:
+    """Shared backend so every API worker reuses the same results."""
+
+    def __init__(self, url: str, max_ttl: int):
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError(
+                "CACHE_REDIS_URL is set but redis is not installed, "
+                "install the `cache` extra"
+            )
+        self.client = redis.from_url(url)
+        self.max_ttl = max_ttl
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(key)
+        return None if raw is None else pickle.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int]) -> None:
+        # never without expiry, keys of older generations are left behind in Redis
+        await self.client.set(
+            key, pickle.dumps(value), ex=self.max_ttl if ttl is None else ttl
+        )
+
+
+class ResultCache:
+    """
+    Read-through cache: the in-process LRU answers first, then the optional shared
+    backend, and only then the loader. Keys carry the data generation, so a bump
+    makes every older entry unreachable without having to delete it.
+    """
+
+    def __init__(
+        self, local: LocalCache, shared: Optional[RedisCache] = None, enabled=True
+    ):
+        self.local = local
+        self.shared = shared
+        self.enabled = enabled
+
+    async def get_or_load(
+        self, key: str, ttl: Optional[int], loader: Callable[[], Awaitable[T]]
+    ) -> T:
+        if not self.enabled:
+            return await loader()
+
+        value = await self.local.get(key)
+        if value is not None:
+            return value
+        if self.shared is not None:
+            value = await self.shared.get(key)
+            if value is not None:
+                await self.local.set(key, value, ttl)
+                return value
+
+        value = await loader()
+        await self.local.set(key, value, ttl)
+        if self.shared is not None:
+            await self.shared.set(key, value, ttl)
+        return value
+
+
+result_cache = ResultCache(
+    LocalCache(settings.cache_maxsize),
+    (
+        RedisCache(settings.cache_redis_url, settings.cache_redis_max_ttl)
+        if settings.cache_redis_url
+        else None
+    ),
+    enabled=settings.cache_enabled,
+)
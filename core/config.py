@@ -1,3 +1,4 @@
+from typing import Optional
 from urllib.parse import quote
 
 from fastapi import HTTPException
@@ -11,13 +12,59 @@ class Settings(BaseSettings):
     mysql_root_password: str
     db_host: str = "db"
     db_port: int = 3306
-    echo_query: bool = True
+    echo_query: bool = False
+
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 500
+
+    db_replica_host: Optional[str] = None
+    db_replica_port: Optional[int] = None
+    # seconds a replica may trail the primary before reads go back to the primary
+    db_replica_max_lag: float = 5
+    db_replica_check_interval: float = 2
 
     cors_origins: list[str] = ["*"]
     cors_allow_credentials: bool = True
     cors_allow_methods: list[str] = ["*"]
     cors_allow_headers: list[str] = ["*"]
 
+    user_credits_batch_size: int = 500
+    dictionary_ttl: int = 300
+
+    plan_parse_workers: int = 2
+    plan_insert_chunk_size: int = 1000
+    plan_upload_dir: str = ".plan_uploads"
+    plan_upload_workers: int = 2
+    plan_upload_heartbeat_interval: int = 15
+    # a running job without a heartbeat for this long belonged to a process that
+    # stopped, the sweep looks for those every plan_upload_sweep_interval
+    plan_upload_stale_after: int = 120
+    plan_upload_sweep_interval: int = 60
+
+    cache_enabled: bool = True
+    cache_maxsize: int = 1024
+    cache_ttl: int = 30
+    cache_redis_url: Optional[str] = None
+    # Redis expiry of entries cached without a TTL, whose keys a generation bump
+    # only makes unreachable
+    cache_redis_max_ttl: int = 7 * 24 * 3600
+
+    analytics_engine_enabled: bool = False
+    analytics_batch_size: int = 100_000
+
+    loader_data_dir: str = "test_data"
+    loader_chunk_size: int = 10_000
+    loader_load_data_infile: bool = False
+    loader_workers: int = 4
+    loader_progress_file: str = ".loader_progress.json"
+
+    export_dir: str = "exports"
+    export_batch_size: int = 50_000
+
     @property
     def db_connection_uri(self) -> str:
         required = [
@@ -34,10 +81,19 @@ class Settings(BaseSettings):
                 detail=f"Missing required setting(s): {', '.join(missing)}",
             )
 
+        return self._mysql_uri(self.db_host, self.db_port)
+
+    @property
+    def db_replica_connection_uri(self) -> Optional[str]:
+        if not self.db_replica_host:
+            return None
+        return self._mysql_uri(
+            self.db_replica_host, self.db_replica_port or self.db_port
+        )
+
+    def _mysql_uri(self, host: str, port: int) -> str:
         user = quote(self.mysql_user)
         password = quote(self.mysql_password)
-        host = self.db_host
-        port = self.db_port
         database = self.mysql_database
 
         db_con_url = f"mysql+asyncmy://{user}:{password}" f"@{host}:{port}/{database}"
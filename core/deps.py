@@ -3,9 +3,11 @@ from typing import AsyncGenerator
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.connection import get_async_session
+from db.connection import get_async_session, get_read_session
 from services.plan_insert_service import PlanService
 from services.plan_performance_service import PlanPerformanceService
+from services.plan_upload_jobs import PlanUploadJobService
+from services.portfolio_service import PortfolioService
 from services.user_credits_service import UserCreditService
 from services.year_rerformance_servise import YearPerformanceService
 
@@ -16,19 +18,31 @@ async def get_plan_insert_service(
     yield PlanService(session)
 
 
-async def get_plan_performance_service(
+async def get_plan_upload_job_service(
     session: AsyncSession = Depends(get_async_session),
+) -> AsyncGenerator[PlanUploadJobService, None]:
+    yield PlanUploadJobService(session)
+
+
+async def get_plan_performance_service(
+    session: AsyncSession = Depends(get_read_session),
 ) -> AsyncGenerator[PlanPerformanceService, None]:
     yield PlanPerformanceService(session)
 
 
 async def get_year_performance_service(
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
 ) -> AsyncGenerator[YearPerformanceService, None]:
     yield YearPerformanceService(session)
 
 
 async def get_user_credits_service(
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
 ) -> AsyncGenerator[UserCreditService, None]:
     yield UserCreditService(session)
+
+
+async def get_portfolio_service(
+    session: AsyncSession = Depends(get_read_session),
+) -> AsyncGenerator[PortfolioService, None]:
+    yield PortfolioService(session)
@@ -0,0 +1,192 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 500)
+UNTAGGED = "untagged"
+
+
+class Histogram:
+    """Prometheus histogram with a single label, rendered in the text format."""
+
+    def __init__(
+        self, name: str, documentation: str, label: str, buckets: Sequence[float]
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = tuple(buckets)
+        # label value -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[str, list[float]] = {}
+
+    def observe(self, label_value: str, value: float) -> None:
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_value, series in sorted(self._series.items()):
+            label = f'{self.label}="{_escape(label_value)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            count = cumulative + series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{label}}} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Request latency per route.",
+    "route",
+    LATENCY_BUCKETS,
+)
+http_request_queries = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request, per route.",
+    "route",
+    QUERY_COUNT_BUCKETS,
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency per repository method.",
+    "query",
+    LATENCY_BUCKETS,
+)
+
+
+def render_metrics(extra: Sequence[str] = ()) -> str:
+    lines = [
+        *http_request_duration.render(),
+        *http_request_queries.render(),
+        *db_query_duration.render(),
+        *extra,
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+request_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "request_query_stats", default=None
+)
+query_tag: ContextVar[str] = ContextVar("query_tag", default=UNTAGGED)
+
+
+def instrument_repo(cls):
+    """Tags every statement run by the class's coroutine methods with `Class.method`."""
+
+    for name, method in list(vars(cls).items()):
+        if name.startswith("__") or not inspect.iscoroutinefunction(method):
+            continue
+        setattr(cls, name, _tagged(method, f"{cls.__name__}.{name}"))
+    return cls
+
+
+def _tagged(method, tag: str):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        # nested repo calls keep the outermost tag
+        if query_tag.get() != UNTAGGED:
+            return await method(*args, **kwargs)
+        token = query_tag.set(tag)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            query_tag.reset(token)
+
+    return wrapper
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_started"].pop()
+        db_query_duration.observe(query_tag.get(), duration)
+        stats = request_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += duration
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(ctx):
+        # after_cursor_execute never runs for a statement that raised
+        if ctx.connection is None or ctx.execution_context is None:
+            return
+        started = ctx.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+class MetricsMiddleware:
+    """
+    Collects per-request SQL totals into a `Server-Timing` header and records route
+    latency histograms once the response body has been sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = request_query_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                elapsed = (time.perf_counter() - started) * 1000
+                timing = (
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+                    f"app;dur={elapsed:.2f}"
+                )
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", timing.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_query_stats.reset(token)
+            route = scope.get("route")
+            route_label = getattr(route, "path", "unmatched")
+            http_request_duration.observe(route_label, time.perf_counter() - started)
+            http_request_queries.observe(route_label, stats.count)
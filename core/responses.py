@@ -0,0 +1,19 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+any_adapter = TypeAdapter(Any)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by pydantic-core instead of `json.dumps`. Services on the
+    hot read paths hand over bytes from a `TypeAdapter.dump_json`, which are sent as
+    they are, skipping FastAPI's response model validation and `jsonable_encoder`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return any_adapter.dump_json(content)
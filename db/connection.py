@@ -1,14 +1,42 @@
-from typing import Any, AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base
 
 from core.config import settings
+from core.metrics import instrument_engine
+from db.pool import InstrumentedQueuePool
+from db.replica import ReplicaRouter
+
+
+def create_engine(url: str) -> AsyncEngine:
+    created = create_async_engine(
+        url=url,
+        echo=settings.echo_query,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        query_cache_size=settings.db_statement_cache_size,
+    )
+    instrument_engine(created.sync_engine)
+    return created
 
-engine = create_async_engine(
-    url=settings.db_connection_uri,
-    echo=settings.echo_query,
-    future=True,
+
+engine = create_engine(settings.db_connection_uri)
+replica_engine = (
+    create_engine(settings.db_replica_connection_uri)
+    if settings.db_replica_connection_uri
+    else None
 )
 
 
@@ -16,8 +44,27 @@ Base = declarative_base()
 
 
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+replica_router = ReplicaRouter(
+    async_session_maker,
+    replica_engine,
+    settings.db_replica_max_lag,
+    settings.db_replica_check_interval,
+)
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, Any]:
     async with async_session_maker() as session:
         yield session
+
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """A replica session within the staleness bound, a primary one otherwise."""
+    maker = await replica_router.session_maker()
+    async with maker() as session:
+        yield session
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, Any]:
+    async with read_session() as session:
+        yield session
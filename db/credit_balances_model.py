@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Date, DECIMAL, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from db.connection import Base
+
+
+class CreditBalance(Base):
+    """Payments summed per credit, kept in step with `payments` by the loader."""
+
+    __tablename__ = "credit_balances"
+
+    credit_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("credits.id", ondelete="CASCADE"), primary_key=True
+    )
+    total_paid: Mapped[DECIMAL] = mapped_column(
+        DECIMAL(16, 2), nullable=False, default=0
+    )
+    body_paid: Mapped[DECIMAL] = mapped_column(
+        DECIMAL(16, 2), nullable=False, default=0
+    )
+    percent_paid: Mapped[DECIMAL] = mapped_column(
+        DECIMAL(16, 2), nullable=False, default=0
+    )
+    last_payment_date: Mapped[Date | None] = mapped_column(Date, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Date, DECIMAL, ForeignKey, BigInteger
+from sqlalchemy import Date, DECIMAL, ForeignKey, BigInteger, Index
 
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -7,6 +7,7 @@ from db.connection import Base
 
 class Credit(Base):
     __tablename__ = "credits"
+    __table_args__ = (Index("ix_credits_issuance_date_body", "issuance_date", "body"),)
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
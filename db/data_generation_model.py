@@ -0,0 +1,10 @@
+from sqlalchemy import BigInteger, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+from db.connection import Base
+
+
+class DataGeneration(Base):
+    __tablename__ = "data_generation"
+
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    generation: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -1,10 +1,20 @@
-from sqlalchemy import BigInteger, Date, ForeignKey, DECIMAL
+from sqlalchemy import BigInteger, Date, ForeignKey, DECIMAL, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from db.connection import Base
 
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_payment_date_sum", "payment_date", "sum"),
+        Index(
+            "ix_payments_credit_id_type_id_date_sum",
+            "credit_id",
+            "type_id",
+            "payment_date",
+            "sum",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     sum: Mapped[DECIMAL] = mapped_column(DECIMAL(12, 2), nullable=False)
@@ -1,10 +1,13 @@
-from sqlalchemy import BigInteger, Date, ForeignKey, DECIMAL
+from sqlalchemy import BigInteger, Date, ForeignKey, DECIMAL, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from db.connection import Base
 
 
 class Plan(Base):
     __tablename__ = "plans"
+    __table_args__ = (
+        Index("ix_plans_period_category_id", "period", "category_id", unique=True),
+    )
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     period: Mapped[Date] = mapped_column(Date, nullable=False)
     sum: Mapped[DECIMAL] = mapped_column(DECIMAL(12, 2), nullable=False)
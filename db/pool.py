@@ -0,0 +1,64 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class CheckoutStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.waiting = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Default async pool that also times every checkout, including waits for a free
+    connection, new connects and pre-ping, so pool exhaustion shows up as numbers.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def connect(self):
+        stats = self.checkout_stats
+        stats.waiting += 1
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            stats.timeouts += 1
+            raise
+        finally:
+            stats.waiting -= 1
+            stats.record(time.perf_counter() - started)
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.checkout_stats = self.checkout_stats
+        return pool
+
+    def snapshot(self) -> dict:
+        stats = self.checkout_stats
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "waiting": stats.waiting,
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "avg_wait_ms": (
+                stats.total_wait / stats.checkouts * 1000 if stats.checkouts else 0.0
+            ),
+            "max_wait_ms": stats.max_wait * 1000,
+        }
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from logs.config.logging_config import logger
+
+
+class ReplicaRouter:
+    """
+    Hands out the replica session maker while the replica is at most `max_lag`
+    seconds behind, the primary one otherwise. Lag comes from `SHOW REPLICA STATUS`
+    and is rechecked every `check_interval` seconds. A server that is not replicating
+    at all (a plain second instance, e.g. locally) counts as up to date.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replica_engine: Optional[AsyncEngine],
+        max_lag: float,
+        check_interval: float,
+    ):
+        self.primary = primary
+        self.replica_engine = replica_engine
+        self.replica = (
+            async_sessionmaker(replica_engine, expire_on_commit=False)
+            if replica_engine is not None
+            else None
+        )
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return self.replica is not None
+
+    async def session_maker(self) -> async_sessionmaker:
+        if not self.configured:
+            return self.primary
+        if self._is_due():
+            async with self._lock:
+                if self._is_due():
+                    await self.check()
+        return self.replica if self.healthy else self.primary
+
+    def _is_due(self) -> bool:
+        return (
+            self._checked_at is None
+            or time.monotonic() - self._checked_at > self.check_interval
+        )
+
+    async def check(self) -> None:
+        try:
+            async with self.replica_engine.connect() as connection:
+                result = await connection.execute(text("SHOW REPLICA STATUS"))
+                status = result.mappings().first()
+            # NULL while the replication threads are stopped
+            self.lag = 0.0 if status is None else status["Seconds_Behind_Source"]
+        except SQLAlchemyError as e:
+            logger.warning(f"Replica lag check failed, reading from primary: {e}")
+            self.lag = None
+        was_healthy = self.healthy
+        self.healthy = self.lag is not None and self.lag <= self.max_lag
+        if was_healthy and not self.healthy:
+            logger.warning(f"Replica lag {self.lag}s is over {self.max_lag}s")
+        self._checked_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {
+            "configured": self.configured,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+        }
@@ -0,0 +1,32 @@
+from sqlalchemy import BigInteger, Date, DECIMAL, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+from db.connection import Base
+
+
+class DailyRollup(Base):
+    __tablename__ = "daily_rollups"
+
+    day: Mapped[Date] = mapped_column(Date, primary_key=True)
+    issuance_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    issuance_sum: Mapped[DECIMAL] = mapped_column(
+        DECIMAL(16, 2), nullable=False, default=0
+    )
+    collection_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    collection_sum: Mapped[DECIMAL] = mapped_column(
+        DECIMAL(16, 2), nullable=False, default=0
+    )
+
+
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+
+    year: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    month: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    issuance_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    issuance_sum: Mapped[DECIMAL] = mapped_column(
+        DECIMAL(16, 2), nullable=False, default=0
+    )
+    collection_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    collection_sum: Mapped[DECIMAL] = mapped_column(
+        DECIMAL(16, 2), nullable=False, default=0
+    )
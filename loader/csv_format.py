@@ -0,0 +1,5 @@
+# Shared by the loader and the generator, free of settings and database imports
+# so the generator runs without a configured database.
+
+# dates in the source CSVs, e.g. 15.01.2024
+DATE_FORMAT = "%d.%m.%Y"
@@ -0,0 +1,296 @@
+"""
+Synthetic data in the `test_data` format, at any scale.
+
+    python -m loader.data_generator --users 1000000 --out generated_data
+    python -m loader.data_loader  # with LOADER_DATA_DIR=generated_data
+
+Distributions follow `test_data`: about a third of users never borrow, the rest take
+one credit or a few, 500-5000 for 14 days. A third of credits are still open (and
+mostly overdue), a third of the closed ones were repaid late. Payments are split
+into body and percent parts, about 11 per credit on average. Users are generated in
+chunks with one seeded generator per chunk, so memory stays bounded and the same
+`--seed` and `--chunk-size` always give the same files.
+"""
+
+import argparse
+import os
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv
+
+from loader.csv_format import DATE_FORMAT
+from logs.config.logging_config import logger
+
+BODY_TYPE_ID = 1
+PERCENT_TYPE_ID = 2
+ISSUANCE_CATEGORY_ID = 3
+COLLECTION_CATEGORY_ID = 4
+DICTIONARY = [(1, "тіло"), (2, "відсотки"), (3, "видача"), (4, "збір")]
+
+TERM_DAYS = 14
+BODIES = np.arange(500, 5001, 500)
+BORROWER_SHARE = 0.64
+EXTRA_CREDIT_P = 0.6
+MAX_CREDITS_PER_USER = 6
+MEAN_DAYS_TO_CREDIT = 120
+OPEN_SHARE = 0.33
+LATE_SHARE = 0.36
+MEAN_LATE_DAYS = 160
+ON_TIME_DAILY_RATE = 0.03
+LATE_DAILY_RATES = (0.015, 0.06)
+DAYS_PER_BODY_PAYMENT = 50
+DAYS_PER_PERCENT_PAYMENT = 25
+MAX_OPEN_PAID_SHARE = 0.9
+
+
+class DataGenerator:
+    def __init__(
+        self,
+        out_dir: str,
+        seed: int = 42,
+        chunk_size: int = 200_000,
+        start: date = date(2020, 1, 1),
+        end: date = date(2022, 8, 1),
+    ):
+        self.out_dir = out_dir
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.start = np.datetime64(start, "D")
+        self.days = (np.datetime64(end, "D") - self.start).astype(int)
+        days = pd.date_range(start, periods=self.days + 1)
+        # every date is formatted once, date columns only hold indices into these
+        self.date_strings = pa.array(days.strftime(DATE_FORMAT))
+        self.month_of_day = (
+            (days.year - start.year) * 12 + days.month - start.month
+        ).to_numpy()
+        self.months = pd.period_range(
+            start, periods=self.month_of_day[-1] + 1, freq="M"
+        )
+        self.issued = np.zeros(len(self.months))
+        self.collected = np.zeros(len(self.months))
+        self.next_credit_id = 1
+        self.next_payment_id = 1
+
+    def generate(self, users: int) -> dict[str, int]:
+        os.makedirs(self.out_dir, exist_ok=True)
+        counts = {"users": 0, "credits": 0, "payments": 0}
+        for chunk, first_user_id in enumerate(range(1, users + 1, self.chunk_size)):
+            size = min(self.chunk_size, users + 1 - first_user_id)
+            rng = np.random.default_rng([self.seed, chunk + 1])
+            written = self._write_chunk(rng, first_user_id, size, append=chunk > 0)
+            for name, count in written.items():
+                counts[name] += count
+            logger.info(f"Chunk {chunk}: {written}")
+        self._write_dictionary()
+        counts["plans"] = self._write_plans(np.random.default_rng([self.seed, 0]))
+        return counts
+
+    def _write_chunk(
+        self, rng: np.random.Generator, first_user_id: int, size: int, append: bool
+    ) -> dict[str, int]:
+        user_ids = np.arange(first_user_id, first_user_id + size)
+        registered = rng.integers(0, self.days + 1, size)
+        self._write(
+            "users.csv",
+            {
+                "id": user_ids,
+                "login": pc.binary_join_element_wise(
+                    "user", pa.array(user_ids).cast(pa.string()), ""
+                ),
+                "registration_date": self._dates(registered),
+            },
+            append,
+        )
+
+        credits = self._credits(rng, user_ids, registered)
+        self._write("credits.csv", credits.pop("columns"), append)
+        payments = self._payments(rng, credits)
+        self._write("payments.csv", payments, append)
+        return {
+            "users": size,
+            "credits": len(credits["ids"]),
+            "payments": len(payments["id"]),
+        }
+
+    def _credits(
+        self, rng: np.random.Generator, user_ids: np.ndarray, registered: np.ndarray
+    ) -> dict:
+        per_user = np.where(
+            rng.random(len(user_ids)) < BORROWER_SHARE,
+            np.minimum(
+                rng.geometric(EXTRA_CREDIT_P, len(user_ids)), MAX_CREDITS_PER_USER
+            ),
+            0,
+        )
+        owners = np.repeat(user_ids, per_user)
+        issued = np.repeat(registered, per_user) + rng.exponential(
+            MEAN_DAYS_TO_CREDIT, len(owners)
+        ).astype(int)
+        # credits past the end of the range are dropped rather than piled on the last day
+        keep = issued <= self.days
+        owners, issued = owners[keep], issued[keep]
+        count = len(owners)
+
+        ids = np.arange(self.next_credit_id, self.next_credit_id + count)
+        self.next_credit_id += count
+        body = rng.choice(BODIES, count)
+        due = issued + TERM_DAYS
+
+        late = rng.random(count) < LATE_SHARE
+        returned = np.where(
+            late,
+            due + 1 + rng.exponential(MEAN_LATE_DAYS, count).astype(int),
+            issued + rng.integers(0, TERM_DAYS + 1, count),
+        )
+        is_open = (rng.random(count) < OPEN_SHARE) | (returned > self.days)
+        held_until = np.where(is_open, self.days, returned)
+        held_days = np.maximum(held_until - issued, TERM_DAYS)
+        daily_rate = np.where(
+            late & ~is_open, rng.uniform(*LATE_DAILY_RATES, count), ON_TIME_DAILY_RATE
+        )
+        percent = np.round(body * daily_rate * held_days, 2)
+
+        np.add.at(self.issued, self.month_of_day[issued], body)
+        return {
+            "ids": ids,
+            "issued": issued,
+            "held_until": held_until,
+            "is_open": is_open,
+            "body": body,
+            "percent": percent,
+            "columns": {
+                "id": ids,
+                "user_id": owners,
+                "issuance_date": self._dates(issued),
+                "return_date": self._dates(np.minimum(due, self.days)),
+                "actual_return_date": self._dates(
+                    np.minimum(returned, self.days), missing=is_open
+                ),
+                "body": body,
+                "percent": percent,
+            },
+        }
+
+    def _payments(self, rng: np.random.Generator, credits: dict) -> dict:
+        held = credits["held_until"] - credits["issued"]
+        count = len(credits["ids"])
+        # open credits have only paid part of what they owe so far
+        paid_share = np.where(
+            credits["is_open"], rng.uniform(0, MAX_OPEN_PAID_SHARE, count), 1.0
+        )
+        parts = []
+        for type_id, total, days_per_payment in (
+            (BODY_TYPE_ID, credits["body"], DAYS_PER_BODY_PAYMENT),
+            (PERCENT_TYPE_ID, credits["percent"], DAYS_PER_PERCENT_PAYMENT),
+        ):
+            per_credit = 1 + rng.poisson(held / days_per_payment)
+            owner = np.repeat(np.arange(count), per_credit)
+            # split each total with normalized random weights
+            weights = rng.exponential(1.0, len(owner))
+            weight_sums = np.bincount(owner, weights, minlength=count)
+            amount = np.round(
+                weights / weight_sums[owner] * (total * paid_share)[owner], 2
+            )
+            day = credits["issued"][owner] + (
+                rng.random(len(owner)) * (held[owner] + 1)
+            ).astype(int)
+            parts.append((owner, day, np.full(len(owner), type_id), amount))
+
+        owner, day, type_id, amount = (np.concatenate(col) for col in zip(*parts))
+        order = np.lexsort((day, owner))
+        owner, day, type_id, amount = (
+            owner[order],
+            day[order],
+            type_id[order],
+            amount[order],
+        )
+        ids = np.arange(self.next_payment_id, self.next_payment_id + len(owner))
+        self.next_payment_id += len(owner)
+
+        np.add.at(self.collected, self.month_of_day[day], amount)
+        return {
+            "id": ids,
+            "credit_id": credits["ids"][owner],
+            "payment_date": self._dates(day),
+            "type_id": type_id,
+            "sum": amount,
+        }
+
+    def _write_dictionary(self) -> None:
+        self._write(
+            "dictionary.csv",
+            {
+                "id": [row[0] for row in DICTIONARY],
+                "name": [row[1] for row in DICTIONARY],
+            },
+            append=False,
+        )
+
+    def _write_plans(self, rng: np.random.Generator) -> int:
+        # plans land within ±20% of what was actually issued and collected
+        periods = self.months.to_timestamp().strftime(DATE_FORMAT).to_numpy()
+        rows = len(periods)
+        category_ids = np.repeat(
+            [[ISSUANCE_CATEGORY_ID, COLLECTION_CATEGORY_ID]], rows, axis=0
+        ).ravel()
+        actual = np.column_stack([self.issued, self.collected]).ravel()
+        plan = np.round(actual * rng.uniform(0.8, 1.2, len(actual)), -3)
+        self._write(
+            "plans.csv",
+            {
+                "id": np.arange(1, len(actual) + 1),
+                "period": np.repeat(periods, 2),
+                "sum": plan.astype(np.int64),
+                "category_id": category_ids,
+            },
+            append=False,
+        )
+        return len(actual)
+
+    def _dates(self, days: np.ndarray, missing: np.ndarray = None) -> pa.Array:
+        return pa.DictionaryArray.from_arrays(
+            pa.array(days, mask=missing), self.date_strings
+        )
+
+    def _write(self, filename: str, columns: dict, append: bool) -> None:
+        # pyarrow's writer is an order of magnitude faster than DataFrame.to_csv
+        with open(os.path.join(self.out_dir, filename), "ab" if append else "wb") as f:
+            if not append:
+                f.write(("\t".join(columns) + "\n").encode())
+            csv.write_csv(
+                pa.table(columns),
+                f,
+                csv.WriteOptions(
+                    include_header=False, delimiter="\t", quoting_style="none"
+                ),
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, required=True)
+    parser.add_argument("--out", default="generated_data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--chunk-size", type=int, default=200_000, help="users per chunk"
+    )
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2020, 1, 1))
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2022, 8, 1))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = DataGenerator(
+        args.out, args.seed, args.chunk_size, args.start, args.end
+    ).generate(args.users)
+    logger.info(
+        f"Generated {counts} into {args.out} in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
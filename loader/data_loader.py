@@ -1,19 +1,70 @@
+import os
+from datetime import date
+from decimal import Decimal
+
 import pandas as pd
-from typing import List, Type, Callable, Any
+from typing import AsyncIterator, NamedTuple, Type, Callable, Any, Awaitable
 import asyncio
-from sqlalchemy import select
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    MetaData,
+    Subquery,
+    Table,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import settings
 from db.connection import async_session_maker
 from db.users_model import User
 from db.credits_model import Credit
 from db.dictionary_model import Dictionary
 from db.plans_model import Plan
 from db.payments_model import Payment
+from loader.csv_format import DATE_FORMAT
+from loader.import_progress import ImportProgress
 from logs.config.logging_config import logger
+from repo.credit_balance_repo import CreditBalanceRepo
+from repo.data_generation_repo import DataGenerationRepo
+from repo.rollup_repo import RollupRepo
+from services.dictionary_registry import BODY, PERCENT, dictionary_registry
+
+LOADER_RETRIES = 3
+DATE_COLUMNS = {
+    User: ["registration_date"],
+    Plan: ["period"],
+    Credit: ["issuance_date", "return_date", "actual_return_date"],
+    Payment: ["payment_date"],
+}
+
+
+class TableImport(NamedTuple):
+    label: str
+    model_cls: Type
+    csv_loader: Callable[[str], AsyncIterator[pd.DataFrame]]
+    filename: str
+    depends_on: tuple[str, ...] = ()
+    rollup: Callable[[Any, Subquery], Awaitable[None]] | None = None
 
 
 class DataLoader:
+    def __init__(
+        self,
+        data_dir: str = settings.loader_data_dir,
+        chunk_size: int = settings.loader_chunk_size,
+    ):
+        self.data_dir = data_dir
+        self.chunk_size = chunk_size
+
     @staticmethod
-    def parse_dates(series: pd.Series, date_format: str = "%d.%m.%Y") -> pd.Series:
+    def parse_dates(series: pd.Series, date_format: str = DATE_FORMAT) -> pd.Series:
         try:
             parsed = pd.to_datetime(series, format=date_format, errors="coerce")
             return parsed.dt.date.where(series.notnull(), None)
@@ -22,128 +73,298 @@ class DataLoader:
             raise
 
     @staticmethod
-    async def read_csv_async(filename: str, sep: str = "\t") -> pd.DataFrame:
+    async def read_csv_chunks_async(
+        filename: str, chunk_size: int, sep: str = "\t"
+    ) -> AsyncIterator[pd.DataFrame]:
         try:
-            return await asyncio.to_thread(pd.read_csv, filename, sep=sep)
+            reader = await asyncio.to_thread(
+                pd.read_csv, filename, sep=sep, chunksize=chunk_size
+            )
+            with reader:
+                while (
+                    chunk := await asyncio.to_thread(next, reader, None)
+                ) is not None:
+                    yield chunk
         except Exception as e:
             logger.error(f"Failed to load CSV file {filename}: {e}")
             raise
 
-    async def load_dictionaries(self, filename: str) -> List[Dictionary]:
-        df = await self.read_csv_async(filename)
-        return [
-            Dictionary(id=int(row["id"]), name=row["name"]) for _, row in df.iterrows()
-        ]
+    async def _load_table(
+        self, model_cls: Type, filename: str
+    ) -> AsyncIterator[pd.DataFrame]:
+        columns = [column.name for column in model_cls.__table__.columns]
+        async for df in self.read_csv_chunks_async(filename, self.chunk_size):
+            for col in DATE_COLUMNS.get(model_cls, []):
+                df[col] = self.parse_dates(df[col])
+            yield df[columns]
 
-    async def load_users(self, filename: str) -> List[User]:
+    def load_dictionaries(self, filename: str) -> AsyncIterator[pd.DataFrame]:
+        return self._load_table(Dictionary, filename)
 
-        df = await self.read_csv_async(filename)
-        df["registration_date"] = self.parse_dates(df["registration_date"])
-        return [
-            User(
-                id=int(row["id"]),
-                login=row["login"],
-                registration_date=row["registration_date"],
-            )
-            for _, row in df.iterrows()
-        ]
+    def load_users(self, filename: str) -> AsyncIterator[pd.DataFrame]:
+        return self._load_table(User, filename)
 
-    async def load_plans(self, filename: str) -> List[Plan]:
+    def load_plans(self, filename: str) -> AsyncIterator[pd.DataFrame]:
+        return self._load_table(Plan, filename)
 
-        df = await self.read_csv_async(filename)
-        df["period"] = self.parse_dates(df["period"])
-        return [
-            Plan(
-                id=int(row["id"]),
-                period=row["period"],
-                sum=row["sum"],
-                category_id=row["category_id"],
-            )
-            for _, row in df.iterrows()
-        ]
+    def load_credits(self, filename: str) -> AsyncIterator[pd.DataFrame]:
+        return self._load_table(Credit, filename)
 
-    async def load_credits(self, filename: str) -> List[Credit]:
+    def load_payments(self, filename: str) -> AsyncIterator[pd.DataFrame]:
+        return self._load_table(Payment, filename)
 
-        df = await self.read_csv_async(filename)
-        for col in ["issuance_date", "return_date", "actual_return_date"]:
-            df[col] = self.parse_dates(df[col])
-        return [
-            Credit(
-                id=int(row["id"]),
-                user_id=row["user_id"],
-                issuance_date=row["issuance_date"],
-                return_date=row["return_date"],
-                actual_return_date=row["actual_return_date"],
-                body=row["body"],
-                percent=row["percent"],
-            )
-            for _, row in df.iterrows()
-        ]
+    @staticmethod
+    async def daily_deltas(
+        session, day_col: ColumnElement, amount_col: ColumnElement
+    ) -> dict[date, tuple[int, Decimal]]:
+        result = await session.execute(
+            select(day_col, func.count(), func.coalesce(func.sum(amount_col), 0))
+            .group_by(day_col)
+            .order_by(day_col)
+        )
+        return {day: (count, Decimal(total)) for day, count, total in result.all()}
 
-    async def load_payments(self, filename: str) -> List[Payment]:
+    async def rollup_credits(self, session, new_rows: Subquery) -> None:
+        deltas = await self.daily_deltas(
+            session, new_rows.c.issuance_date, new_rows.c.body
+        )
+        await RollupRepo(session).add_issuance(deltas)
+
+    async def rollup_payments(self, session, new_rows: Subquery) -> None:
+        deltas = await self.daily_deltas(
+            session, new_rows.c.payment_date, new_rows.c.sum
+        )
+        await RollupRepo(session).add_collection(deltas)
+        await CreditBalanceRepo(session).add_payments(
+            new_rows, *await self.payment_type_ids(session)
+        )
+
+    @staticmethod
+    async def payment_type_ids(session) -> tuple[int, int]:
+        # dictionaries are imported before payments, so the first lookup sees them
+        registry = await dictionary_registry.ensure_loaded(session)
+        return registry.id_of(BODY), registry.id_of(PERCENT)
+
+    @staticmethod
+    def staging_table(model_cls: Type) -> Table:
+        table = model_cls.__table__
+        return Table(
+            f"staging_{table.name}",
+            MetaData(),
+            *(
+                Column(column.name, column.type, primary_key=column.primary_key)
+                for column in table.columns
+            ),
+            prefixes=["TEMPORARY"],
+        )
+
+    @staticmethod
+    async def drop_staging(session, staging: Table) -> None:
+        # a plain DROP TABLE commits the open transaction in MySQL, this one does not
+        await session.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {staging.name}"))
 
-        df = await self.read_csv_async(filename)
-        df["payment_date"] = self.parse_dates(df["payment_date"])
+    def import_plan(self) -> list[TableImport]:
+        # topologically ordered: every table comes after the tables it references
         return [
-            Payment(
-                id=int(row["id"]),
-                sum=row["sum"],
-                payment_date=row["payment_date"],
-                credit_id=row["credit_id"],
-                type_id=row["type_id"],
-            )
-            for _, row in df.iterrows()
+            TableImport(
+                "dictionaries", Dictionary, self.load_dictionaries, "dictionary.csv"
+            ),
+            TableImport("users", User, self.load_users, "users.csv"),
+            TableImport(
+                "plans",
+                Plan,
+                self.load_plans,
+                "plans.csv",
+                depends_on=("dictionaries",),
+            ),
+            TableImport(
+                "credits",
+                Credit,
+                self.load_credits,
+                "credits.csv",
+                depends_on=("users",),
+                rollup=self.rollup_credits,
+            ),
+            TableImport(
+                "payments",
+                Payment,
+                self.load_payments,
+                "payments.csv",
+                depends_on=("dictionaries", "credits"),
+                rollup=self.rollup_payments,
+            ),
         ]
 
     async def _import_data(
         self,
-        session,
-        model_cls: Type,
-        csv_loader: Callable[[str], Any],
-        filename: str,
-        log_label: str,
-        id_field: str = "id",
-    ):
+        spec: TableImport,
+        progress: ImportProgress,
+        workers: asyncio.Semaphore,
+        dependencies: list[asyncio.Task],
+    ) -> None:
+        await asyncio.gather(*dependencies)
+
+        filename = self._path(spec.filename)
+        if progress.is_complete(spec.label, filename):
+            logger.warning(f"{spec.label.capitalize()} already imported, skipping.")
+            return
+
+        done_chunks = progress.done_chunks(spec.label, filename)
+        imported = 0
 
-        result = await session.execute(select(getattr(model_cls, id_field)))
-        existing_ids = {row[0] for row in result.all()}
-        objs = await csv_loader(filename)
-        new_objs = [obj for obj in objs if getattr(obj, id_field) not in existing_ids]
+        async def import_chunk(index: int, df: pd.DataFrame) -> None:
+            nonlocal imported
+            try:
+                imported += await self._import_chunk(spec, df)
+                progress.mark_chunk(spec.label, filename, index)
+            finally:
+                workers.release()
 
-        if new_objs:
-            session.add_all(new_objs)
-            logger.info(f"Imported {len(new_objs)} {log_label}.")
+        index = 0
+        async with asyncio.TaskGroup() as chunks:
+            async for df in spec.csv_loader(filename):
+                if index not in done_chunks:
+                    # acquiring before spawning bounds the chunks held in memory
+                    await workers.acquire()
+                    chunks.create_task(import_chunk(index, df))
+                index += 1
+
+        progress.mark_complete(spec.label, filename)
+        if imported:
+            logger.info(f"Imported {imported} {spec.label}.")
         else:
-            logger.warning(f"{log_label.capitalize()} already up-to-date.")
+            logger.warning(f"{spec.label.capitalize()} already up-to-date.")
+
+    async def _import_chunk(
+        self, spec: TableImport, df: pd.DataFrame, id_field: str = "id"
+    ) -> int:
+        """
+        Loads the chunk into a temporary staging table on its own connection and
+        inserts only the rows whose id is not in the target table yet (anti-join).
+        """
+        table = spec.model_cls.__table__
+        staging = self.staging_table(spec.model_cls)
+        new_rows = (
+            select(*staging.c)
+            .outerjoin(table, table.c[id_field] == staging.c[id_field])
+            .where(table.c[id_field].is_(None))
+        )
+        insert_new = insert(table).from_select([c.name for c in staging.c], new_rows)
+        records = df.astype(object).where(df.notnull(), None).to_dict("records")
+
+        for attempt in range(1, LOADER_RETRIES + 1):
+            try:
+                async with async_session_maker() as session:
+                    connection = await session.connection()
+                    # a failed attempt may leave the table on the pooled connection
+                    await self.drop_staging(session, staging)
+                    await connection.run_sync(staging.create)
+                    await session.execute(insert(staging), records)
+                    if spec.rollup is not None:
+                        await spec.rollup(session, new_rows.subquery())
+                    result = await session.execute(insert_new)
+                    await self.drop_staging(session, staging)
+                    await session.commit()
+                    return result.rowcount
+            except OperationalError as e:
+                # concurrent chunks may deadlock on shared rollup rows; retrying is safe
+                # because the anti-join skips whatever is already committed
+                if attempt == LOADER_RETRIES or "deadlock" not in str(e).lower():
+                    raise
+                logger.warning(f"Retrying {spec.label} chunk after deadlock: {e}")
+
+    async def load_data_infile(self, session, model_cls: Type, filename: str) -> None:
+        """
+        MySQL fast path: the server reads the CSV itself, converting dates with
+        STR_TO_DATE and skipping rows whose primary key already exists.
+        """
+        table = model_cls.__table__
+        header = pd.read_csv(filename, sep="\t", nrows=0).columns
+        unknown = [col for col in header if col not in table.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns {unknown} in {filename}")
+
+        date_columns = DATE_COLUMNS.get(model_cls, [])
+        assignments = ", ".join(
+            (
+                f"{col} = STR_TO_DATE(NULLIF(@{col}, ''), '{DATE_FORMAT}')"
+                if col in date_columns
+                else f"{col} = NULLIF(@{col}, '')"
+            )
+            for col in header
+        )
+        await session.execute(
+            text(
+                f"LOAD DATA LOCAL INFILE :path IGNORE INTO TABLE {table.name} "
+                f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' IGNORE 1 LINES "
+                f"({', '.join(f'@{col}' for col in header)}) SET {assignments}"
+            ),
+            {"path": os.path.abspath(filename)},
+        )
+        logger.info(f"Loaded {filename} into {table.name} with LOAD DATA.")
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.data_dir, filename)
 
     async def import_all(self) -> None:
+        """
+        Imports all tables, running independent tables and chunks of the same table
+        concurrently on separate pooled connections, at most `loader_workers` at a time.
+        """
+        if settings.loader_load_data_infile:
+            await self.import_all_infile()
+            return
 
+        progress = ImportProgress(settings.loader_progress_file)
+        workers = asyncio.Semaphore(settings.loader_workers)
+        tasks: dict[str, asyncio.Task] = {}
+        try:
+            async with asyncio.TaskGroup() as group:
+                for spec in self.import_plan():
+                    dependencies = [tasks[label] for label in spec.depends_on]
+                    tasks[spec.label] = group.create_task(
+                        self._import_data(spec, progress, workers, dependencies)
+                    )
+        finally:
+            # committed chunks are visible even when the import fails part way
+            await self.bump_generation()
+        progress.clear()
+
+    @staticmethod
+    async def bump_generation() -> None:
         async with async_session_maker() as session:
-            await self._import_data(
-                session,
-                Dictionary,
-                self.load_dictionaries,
-                "test_data/dictionary.csv",
-                "dictionaries",
-            )
-            await self._import_data(
-                session, User, self.load_users, "test_data/users.csv", "users"
-            )
-            await self._import_data(
-                session, Plan, self.load_plans, "test_data/plans.csv", "plans"
-            )
-            await self._import_data(
-                session, Credit, self.load_credits, "test_data/credits.csv", "credits"
-            )
-            await self._import_data(
-                session,
-                Payment,
-                self.load_payments,
-                "test_data/payments.csv",
-                "payments",
-            )
+            await DataGenerationRepo(session).bump()
             await session.commit()
 
+    async def import_all_infile(self) -> None:
+        engine = create_async_engine(
+            url=settings.db_connection_uri,
+            echo=settings.echo_query,
+            poolclass=NullPool,
+            connect_args={"local_infile": True},
+        )
+        try:
+            async with async_sessionmaker(engine)() as session:
+                for model_cls, filename in (
+                    (Dictionary, "dictionary.csv"),
+                    (User, "users.csv"),
+                    (Plan, "plans.csv"),
+                    (Credit, "credits.csv"),
+                    (Payment, "payments.csv"),
+                ):
+                    await self.load_data_infile(
+                        session, model_cls, self._path(filename)
+                    )
+                # skipped duplicates are unknown here, so recount instead of adding
+                await RollupRepo(session).rebuild()
+                await CreditBalanceRepo(session).rebuild(
+                    *await self.payment_type_ids(session)
+                )
+                await DataGenerationRepo(session).bump()
+                await session.commit()
+        finally:
+            await engine.dispose()
+
 
 if __name__ == "__main__":
     loader = DataLoader()
@@ -0,0 +1,57 @@
+import json
+import os
+
+
+class ImportProgress:
+    """
+    Remembers which CSV chunks were already committed, so an interrupted import
+    resumes where it stopped. Progress of a file is forgotten once the file changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._state: dict[str, dict] = json.load(f)
+        except FileNotFoundError:
+            self._state = {}
+
+    @staticmethod
+    def _signature(filename: str) -> str:
+        stat = os.stat(filename)
+        return f"{os.path.abspath(filename)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _table(self, table: str, filename: str) -> dict:
+        signature = self._signature(filename)
+        state = self._state.get(table)
+        if state is None or state["signature"] != signature:
+            state = {"signature": signature, "done_chunks": [], "complete": False}
+            self._state[table] = state
+        return state
+
+    def is_complete(self, table: str, filename: str) -> bool:
+        return self._table(table, filename)["complete"]
+
+    def done_chunks(self, table: str, filename: str) -> set[int]:
+        return set(self._table(table, filename)["done_chunks"])
+
+    def mark_chunk(self, table: str, filename: str, index: int) -> None:
+        self._table(table, filename)["done_chunks"].append(index)
+        self._save()
+
+    def mark_complete(self, table: str, filename: str) -> None:
+        state = self._table(table, filename)
+        state["complete"] = True
+        state["done_chunks"] = []
+        self._save()
+
+    def clear(self) -> None:
+        self._state = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.path)
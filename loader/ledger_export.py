@@ -0,0 +1,258 @@
+"""
+Parquet snapshots of the ledger for analysts, partitioned by month.
+
+    python -m loader.ledger_export --out exports
+    python -m loader.ledger_export --out exports --full
+
+`credits` and `payments` land in `<table>/<issuance|payment>_month=YYYY-MM/`, and
+`plans` and `dictionary` are small enough to rewrite whole on every run. Later runs
+only rewrite the months whose row count or checksum differs from the one kept in
+`_manifest.json`, so rows committed out of id order, updated in place or deleted
+since are picked up as well. Rows are read from a server-side cursor on the read
+replica when one is configured, so memory stays at one batch per table. The API
+starts the same export with `POST /internal/exports`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import time
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Column
+
+from core.config import settings
+from db.connection import read_session
+from db.credits_model import Credit
+from db.dictionary_model import Dictionary
+from db.payments_model import Payment
+from db.plans_model import Plan
+from logs.config.logging_config import logger
+from repo.export_repo import ExportRepo
+
+MANIFEST = "_manifest.json"
+COMPRESSION = "zstd"
+MONEY = pa.decimal128(12, 2)
+
+
+class TableExport(NamedTuple):
+    label: str
+    columns: tuple[Column, ...]
+    schema: pa.Schema
+    partition: Optional[str] = None
+    date_column: Optional[Column] = None
+
+
+EXPORTS = (
+    TableExport(
+        "credits",
+        (
+            Credit.id,
+            Credit.user_id,
+            Credit.issuance_date,
+            Credit.return_date,
+            Credit.actual_return_date,
+            Credit.body,
+            Credit.percent,
+        ),
+        pa.schema(
+            [
+                ("id", pa.int64()),
+                ("user_id", pa.int64()),
+                ("issuance_date", pa.date32()),
+                ("return_date", pa.date32()),
+                ("actual_return_date", pa.date32()),
+                ("body", MONEY),
+                ("percent", MONEY),
+            ]
+        ),
+        "issuance_month",
+        Credit.issuance_date,
+    ),
+    TableExport(
+        "payments",
+        (
+            Payment.id,
+            Payment.credit_id,
+            Payment.payment_date,
+            Payment.type_id,
+            Payment.sum,
+        ),
+        pa.schema(
+            [
+                ("id", pa.int64()),
+                ("credit_id", pa.int64()),
+                ("payment_date", pa.date32()),
+                ("type_id", pa.int32()),
+                ("sum", MONEY),
+            ]
+        ),
+        "payment_month",
+        Payment.payment_date,
+    ),
+    TableExport(
+        "plans",
+        (Plan.id, Plan.period, Plan.category_id, Plan.sum),
+        pa.schema(
+            [
+                ("id", pa.int64()),
+                ("period", pa.date32()),
+                ("category_id", pa.int32()),
+                ("sum", MONEY),
+            ]
+        ),
+    ),
+    TableExport(
+        "dictionary",
+        (Dictionary.id, Dictionary.name),
+        pa.schema([("id", pa.int32()), ("name", pa.string())]),
+    ),
+)
+
+
+def month_bounds(year: int, month: int) -> tuple[date, date]:
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+class LedgerExporter:
+    def __init__(self, out_dir: str, full: bool = False):
+        self.out_dir = out_dir
+        self.full = full
+        self.manifest_path = os.path.join(out_dir, MANIFEST)
+
+    async def export_all(self) -> dict:
+        manifest = {} if self.full else self.read_manifest()
+        tables = manifest.setdefault("tables", {})
+        for spec in EXPORTS:
+            started = time.perf_counter()
+            if self.full:
+                shutil.rmtree(
+                    os.path.join(self.out_dir, spec.label), ignore_errors=True
+                )
+            async with read_session() as session:
+                tables[spec.label] = await self._export(
+                    ExportRepo(session), spec, tables.get(spec.label, {})
+                )
+            summary = {k: v for k, v in tables[spec.label].items() if k != "months"}
+            logger.info(
+                f"Exported {spec.label}: {summary} "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            manifest["exported_at"] = datetime.now().isoformat(timespec="seconds")
+            # after every table, a failed run keeps what already finished
+            self._write_manifest(manifest)
+        return manifest
+
+    async def _export(self, repo: ExportRepo, spec: TableExport, state: dict) -> dict:
+        id_column = spec.columns[0]
+        max_id = await repo.get_max_id(id_column)
+        if spec.partition is None:
+            rows = await self._write(
+                repo,
+                spec,
+                os.path.join(self.out_dir, spec.label),
+                id_column,
+                max_id,
+            )
+            return {"last_id": max_id, "rows": rows}
+
+        months = await repo.get_month_stats(spec.columns, spec.date_column, max_id)
+        exported = state.get("months", {})
+        changed = [
+            key for key, stats in months.items() if exported.get(key) != list(stats)
+        ]
+        for key in changed:
+            start, end = month_bounds(*map(int, key.split("-")))
+            await self._write(
+                repo,
+                spec,
+                self._partition_dir(spec, key),
+                id_column,
+                max_id,
+                start,
+                end,
+            )
+        # every row of these months is gone
+        for key in exported.keys() - months.keys():
+            shutil.rmtree(self._partition_dir(spec, key), ignore_errors=True)
+        return {
+            "last_id": max_id,
+            "rewritten_months": len(changed),
+            "months": {key: list(stats) for key, stats in months.items()},
+        }
+
+    def _partition_dir(self, spec: TableExport, month: str) -> str:
+        return os.path.join(self.out_dir, spec.label, f"{spec.partition}={month}")
+
+    @staticmethod
+    async def _write(
+        repo: ExportRepo,
+        spec: TableExport,
+        directory: str,
+        id_column: Column,
+        max_id: int,
+        month_start: Optional[date] = None,
+        month_end: Optional[date] = None,
+    ) -> int:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "part-0.parquet")
+        tmp_path = path + ".tmp"
+        result = await repo.stream_rows(
+            spec.columns,
+            id_column,
+            max_id,
+            spec.date_column,
+            month_start,
+            month_end,
+        )
+        rows = 0
+        with pq.ParquetWriter(tmp_path, spec.schema, compression=COMPRESSION) as writer:
+            async for batch in result.partitions():
+                columns = zip(*batch)
+                writer.write_batch(
+                    pa.record_batch(
+                        [
+                            pa.array(values, type=field.type)
+                            for values, field in zip(columns, spec.schema)
+                        ],
+                        schema=spec.schema,
+                    )
+                )
+                rows += len(batch)
+        # readers never see a half written partition
+        os.replace(tmp_path, path)
+        return rows
+
+    def read_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: dict) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default=settings.export_dir)
+    parser.add_argument(
+        "--full", action="store_true", help="ignore the manifest, rewrite everything"
+    )
+    args = parser.parse_args()
+    asyncio.run(LedgerExporter(args.out, args.full).export_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import asyncio
+
+from db.connection import async_session_maker
+from logs.config.logging_config import logger
+from repo.credit_balance_repo import CreditBalanceRepo
+from services.dictionary_registry import BODY, PERCENT, dictionary_registry
+
+
+async def rebuild_balances() -> None:
+    async with async_session_maker() as session:
+        registry = await dictionary_registry.ensure_loaded(session)
+        await CreditBalanceRepo(session).rebuild(
+            registry.id_of(BODY), registry.id_of(PERCENT)
+        )
+        await session.commit()
+    logger.info("Credit balances rebuilt.")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_balances())
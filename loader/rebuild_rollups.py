@@ -0,0 +1,18 @@
+import asyncio
+
+from db.connection import async_session_maker
+from logs.config.logging_config import logger
+from repo.data_generation_repo import DataGenerationRepo
+from repo.rollup_repo import RollupRepo
+
+
+async def rebuild_rollups() -> None:
+    async with async_session_maker() as session:
+        await RollupRepo(session).rebuild()
+        await DataGenerationRepo(session).bump()
+        await session.commit()
+    logger.info("Daily and monthly rollups rebuilt.")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_rollups())
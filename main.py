@@ -1,11 +1,42 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from sqlalchemy.exc import SQLAlchemyError
 
+from db.connection import async_session_maker
+from repo.data_generation_repo import DataGenerationRepo
+from logs.config.logging_config import logger
 
+from core.metrics import MetricsMiddleware
 from routers.health_check_router import health_check_router
+from routers.internal_router import internal_router
+from routers.metrics_router import metrics_router
 from routers.plan_insert_router import load_data_rout
 from routers.plan_performance_router import plan_perf_rout
+from routers.portfolio_router import portfolio_router
 from routers.user_credits_rout import user_credits
 from routers.year_performance_router import year_performance_router
+from services.analytics_engine import analytics_engine
+from services.dictionary_registry import dictionary_registry
+from services.ledger_export_service import ledger_exports
+from services.plan_upload_jobs import plan_upload_workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        async with async_session_maker() as session:
+            await dictionary_registry.refresh(session)
+            if analytics_engine.enabled:
+                generation = await DataGenerationRepo(session).get()
+                await analytics_engine.refresh(session, generation)
+    except SQLAlchemyError as e:
+        # requests retry the load, the database may simply not be up yet
+        logger.warning(f"Could not preload dictionary and analytics at startup: {e}")
+    await plan_upload_workers.start()
+    yield
+    await plan_upload_workers.stop()
+    await ledger_exports.stop()
 
 
 def create_app() -> FastAPI:
@@ -14,12 +45,17 @@ def create_app() -> FastAPI:
         docs_url="/docs",
         description="Data Factory test task",
         debug=True,
+        lifespan=lifespan,
     )
     app.include_router(health_check_router)
     app.include_router(load_data_rout)
     app.include_router(user_credits)
     app.include_router(plan_perf_rout)
     app.include_router(year_performance_router)
+    app.include_router(portfolio_router)
+    app.include_router(internal_router)
+    app.include_router(metrics_router)
+    app.add_middleware(MetricsMiddleware)
     return app
 
 
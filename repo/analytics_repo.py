@@ -0,0 +1,68 @@
+from typing import Sequence
+
+from sqlalchemy import BigInteger, Row, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+
+from core.config import settings
+from core.metrics import instrument_repo
+from db import Dictionary, Plan
+from db.credits_model import Credit
+from db.payments_model import Payment
+
+
+def cents(column):
+    # exact integers, so the engine never sums floats
+    return cast(func.round(func.coalesce(column, 0) * 100), BigInteger)
+
+
+@instrument_repo
+class AnalyticsRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_credits_state(self) -> tuple[int, int]:
+        return await self._state(Credit.id)
+
+    async def get_payments_state(self) -> tuple[int, int]:
+        return await self._state(Payment.id)
+
+    async def _state(self, id_column) -> tuple[int, int]:
+        """Row count and the highest id, enough to tell appends from rewrites."""
+        result = await self.session.execute(
+            select(func.count(id_column), func.coalesce(func.max(id_column), 0))
+        )
+        count, max_id = result.one()
+        return count, max_id
+
+    async def stream_credits(self, after_id: int) -> AsyncResult:
+        return await self._stream(
+            select(Credit.id, Credit.issuance_date, cents(Credit.body))
+            .where(Credit.id > after_id)
+            .order_by(Credit.id)
+        )
+
+    async def stream_payments(self, after_id: int) -> AsyncResult:
+        return await self._stream(
+            select(Payment.id, Payment.payment_date, cents(Payment.sum))
+            .where(Payment.id > after_id)
+            .order_by(Payment.id)
+        )
+
+    async def _stream(self, query) -> AsyncResult:
+        return await self.session.stream(
+            query.execution_options(yield_per=settings.analytics_batch_size)
+        )
+
+    async def get_plans(self) -> Sequence[Row]:
+        result = await self.session.execute(
+            select(
+                Plan.id,
+                Plan.period,
+                Plan.category_id,
+                cents(Plan.sum).label("cents"),
+                Dictionary.name.label("category"),
+            )
+            .outerjoin(Dictionary, Plan.category_id == Dictionary.id)
+            .order_by(Plan.id)
+        )
+        return result.all()
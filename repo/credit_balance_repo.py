@@ -0,0 +1,76 @@
+from sqlalchemy import FromClause, Select, case, delete, func, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import instrument_repo
+from db.credit_balances_model import CreditBalance
+from db.payments_model import Payment
+
+BALANCE_COLUMNS = [
+    "credit_id",
+    "total_paid",
+    "body_paid",
+    "percent_paid",
+    "last_payment_date",
+]
+
+
+@instrument_repo
+class CreditBalanceRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def _balances_query(
+        payments: FromClause, body_type_id: int, percent_type_id: int
+    ) -> Select:
+        """One balance row per credit of `payments`, any selectable shaped like it."""
+        c = payments.c
+        return select(
+            c.credit_id,
+            func.sum(c.sum),
+            func.coalesce(func.sum(case((c.type_id == body_type_id, c.sum))), 0),
+            func.coalesce(func.sum(case((c.type_id == percent_type_id, c.sum))), 0),
+            func.max(c.payment_date),
+        ).group_by(c.credit_id)
+
+    async def add_payments(
+        self, payments: FromClause, body_type_id: int, percent_type_id: int
+    ) -> None:
+        """Adds `payments`, rows on their way into the table, to their credits."""
+        result = await self.session.execute(
+            self._balances_query(payments, body_type_id, percent_type_id).order_by(
+                payments.c.credit_id
+            )
+        )
+        # ordered by credit, so concurrent loaders lock the rows in the same order
+        rows = [dict(zip(BALANCE_COLUMNS, row)) for row in result.all()]
+        if not rows:
+            return
+
+        stmt = mysql_insert(CreditBalance)
+        stmt = stmt.on_duplicate_key_update(
+            {
+                "total_paid": CreditBalance.total_paid + stmt.inserted.total_paid,
+                "body_paid": CreditBalance.body_paid + stmt.inserted.body_paid,
+                "percent_paid": CreditBalance.percent_paid + stmt.inserted.percent_paid,
+                # GREATEST is NULL as soon as one argument is
+                "last_payment_date": func.greatest(
+                    func.coalesce(
+                        CreditBalance.last_payment_date,
+                        stmt.inserted.last_payment_date,
+                    ),
+                    stmt.inserted.last_payment_date,
+                ),
+            }
+        )
+        await self.session.execute(stmt, rows)
+
+    async def rebuild(self, body_type_id: int, percent_type_id: int) -> None:
+        await self.session.execute(delete(CreditBalance))
+        await self.session.execute(
+            insert(CreditBalance).from_select(
+                BALANCE_COLUMNS,
+                self._balances_query(Payment.__table__, body_type_id, percent_type_id),
+            )
+        )
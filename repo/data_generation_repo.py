@@ -0,0 +1,26 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import instrument_repo
+from db.data_generation_model import DataGeneration
+
+GENERATION_ID = 1
+
+
+@instrument_repo
+class DataGenerationRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self) -> int:
+        q = select(DataGeneration.generation).where(DataGeneration.id == GENERATION_ID)
+        result = await self.session.execute(q)
+        return result.scalar_one_or_none() or 0
+
+    async def bump(self) -> None:
+        """Marks cached results stale; commits with the caller's transaction."""
+        await self.session.execute(
+            update(DataGeneration)
+            .where(DataGeneration.id == GENERATION_ID)
+            .values(generation=DataGeneration.generation + 1)
+        )
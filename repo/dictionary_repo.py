@@ -0,0 +1,15 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import instrument_repo
+from db import Dictionary
+
+
+@instrument_repo
+class DictionaryRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_ids_by_name(self) -> dict[str, int]:
+        result = await self.session.execute(select(Dictionary.name, Dictionary.id))
+        return {name: dictionary_id for name, dictionary_id in result.all()}
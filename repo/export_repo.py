@@ -0,0 +1,59 @@
+from datetime import date
+from typing import Optional, Sequence
+
+from sqlalchemy import Column, func, select
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+
+from core.config import settings
+from core.metrics import instrument_repo
+
+
+@instrument_repo
+class ExportRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_max_id(self, id_column: Column) -> int:
+        result = await self.session.execute(
+            select(func.coalesce(func.max(id_column), 0))
+        )
+        return result.scalar_one()
+
+    async def get_month_stats(
+        self, columns: Sequence[Column], date_column: Column, max_id: int
+    ) -> dict[str, tuple[int, int]]:
+        """
+        Row count and a checksum of every column of the rows up to `max_id` in each
+        month, keyed by `YYYY-MM`. The first column is the id.
+        """
+        year = func.extract("year", date_column)
+        month = func.extract("month", date_column)
+        # moves with rows updated in place too, not only with added or deleted ones
+        checksum = func.sum(func.crc32(func.concat_ws("|", *columns)))
+        result = await self.session.execute(
+            select(year, month, func.count(columns[0]), checksum)
+            .where(columns[0] <= max_id)
+            .group_by(year, month)
+            .order_by(year, month)
+        )
+        return {
+            f"{int(y):04d}-{int(m):02d}": (count, int(checksum))
+            for y, m, count, checksum in result.all()
+        }
+
+    async def stream_rows(
+        self,
+        columns: Sequence[Column],
+        id_column: Column,
+        max_id: int,
+        date_column: Optional[Column] = None,
+        month_start: Optional[date] = None,
+        month_end: Optional[date] = None,
+    ) -> AsyncResult:
+        """Rows up to `max_id` from a server-side cursor, optionally within a month."""
+        q = select(*columns).where(id_column <= max_id).order_by(id_column)
+        if date_column is not None:
+            q = q.where(date_column >= month_start, date_column < month_end)
+        return await self.session.stream(
+            q.execution_options(yield_per=settings.export_batch_size)
+        )
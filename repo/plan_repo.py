@@ -1,192 +1,226 @@
 from datetime import date
-from decimal import Decimal
-from typing import Sequence
+from typing import Optional, Sequence
 
-from sqlalchemy import func, and_
+from sqlalchemy import case, func, true, insert, Column, Integer, MetaData, Table
 
 
-from sqlalchemy import select, Row, Date
+from sqlalchemy import select, Row, Date, Select, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased
 
+from core.metrics import instrument_repo
 from db import Plan, Dictionary
-from sqlalchemy import tuple_
 
-from db.credits_model import Credit
-from db.payments_model import Payment
+from db.rollups_model import DailyRollup, MonthlyRollup
 
+plan_keys = Table(
+    "staging_plan_keys",
+    MetaData(),
+    Column("period", Date, nullable=False),
+    Column("category_id", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+)
 
+YearMonth = tuple[int, int]
+
+
+def pct(part, whole):
+    # rounded by the database so responses need no per-field rounding
+    return func.round(part / whole * 100, 2)
+
+
+@instrument_repo
 class PlanRepo:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def check_exists(
-        self, periods_and_categories: list[tuple[str, int]]
+        self, periods_and_categories: Sequence[dict]
     ) -> Sequence[Row[tuple[Date, int]]]:
-        q = select(Plan.period, Plan.category_id).where(
-            tuple_(Plan.period, Plan.category_id).in_(periods_and_categories)
+        # join against a temporary key table instead of sending one giant IN list
+        await self._drop_plan_keys()
+        connection = await self.session.connection()
+        await connection.run_sync(plan_keys.create)
+        await self.session.execute(insert(plan_keys), periods_and_categories)
+        q = (
+            select(Plan.period, Plan.category_id)
+            .join(
+                plan_keys,
+                (plan_keys.c.period == Plan.period)
+                & (plan_keys.c.category_id == Plan.category_id),
+            )
+            .distinct()
         )
         result = await self.session.execute(q)
         duplicates = result.all()
+        await self._drop_plan_keys()
         return duplicates
 
-    async def add_plans(self, plans: list["Plan"]):
-        self.session.add_all(plans)
-        await self.session.commit()
-        return plans
-
-    async def get_actual_sum(
-        self, category: str, period_start: date, period_to: date
-    ) -> Decimal:
-
-        if category.lower() == "видача":
-            credit_q = select(func.coalesce(func.sum(Credit.body), 0)).where(
-                and_(
-                    Credit.issuance_date >= period_start,
-                    Credit.issuance_date <= period_to,
-                )
+    async def _drop_plan_keys(self) -> None:
+        # unlike plan_keys.drop, leaves the caller's transaction open in MySQL
+        await self.session.execute(
+            text(f"DROP TEMPORARY TABLE IF EXISTS {plan_keys.name}")
+        )
+
+    async def add_plans(self, plans: Sequence[dict], commit: bool = True) -> int:
+        await self.session.execute(insert(Plan), plans)
+        if commit:
+            await self.session.commit()
+        return len(plans)
+
+    async def get_performance(
+        self, target_date: date, issuance_id: int, collection_id: int
+    ) -> Sequence[Row]:
+        period_start = target_date.replace(day=1)
+        month_to_date_subq = (
+            select(
+                func.coalesce(func.sum(DailyRollup.issuance_sum), 0).label(
+                    "issuance_sum"
+                ),
+                func.coalesce(func.sum(DailyRollup.collection_sum), 0).label(
+                    "collection_sum"
+                ),
             )
-            credit_res = await self.session.execute(credit_q)
-            return Decimal(credit_res.scalar() or 0)
-        elif category.lower() == "збір":
-            payment_q = select(func.coalesce(func.sum(Payment.sum), 0)).where(
-                and_(
-                    Payment.payment_date >= period_start,
-                    Payment.payment_date <= period_to,
-                )
+            .where(
+                DailyRollup.day >= period_start,
+                DailyRollup.day <= target_date,
             )
-            payment_res = await self.session.execute(payment_q)
-            return Decimal(payment_res.scalar() or 0)
-        return Decimal(0)
+            .subquery()
+        )
+        fact_sum = case(
+            (Plan.category_id == issuance_id, month_to_date_subq.c.issuance_sum),
+            (Plan.category_id == collection_id, month_to_date_subq.c.collection_sum),
+            else_=0,
+        )
 
-    async def get_plans_for_period(self, period: date):
         result = await self.session.execute(
             select(
-                Plan.id,
                 Plan.period,
-                Plan.sum,
                 Dictionary.name.label("category"),
-                Plan.category_id,
+                Plan.sum.label("plan_sum"),
+                fact_sum.label("fact_sum"),
+                case(
+                    (Plan.sum > 0, func.round(fact_sum * 100 / Plan.sum, 2)),
+                    else_=0,
+                ).label("percent"),
             )
             .join(Dictionary, Plan.category_id == Dictionary.id)
-            .where(Plan.period == period.replace(day=1))
+            .join(month_to_date_subq, true())
+            .where(Plan.period == period_start)
+            .order_by(Plan.id)
         )
-        return result.fetchall()
+        return result.all()
+
+    async def get_stats(
+        self,
+        year: int,
+        issuance_id: int,
+        collection_id: int,
+        limit: int = 12,
+        offset: int = 0,
+    ):
+        q = self._stats_query((year, 1), (year, 12), issuance_id, collection_id)
+        q = q.limit(limit).offset(offset)
+        return await self.session.execute(q)
 
-    async def get_stats(self, year: int, limit: int = 12, offset: int = 0):
-        credits_subq = (
-            select(
-                func.extract("month", Credit.issuance_date).label("month"),
-                func.extract("year", Credit.issuance_date).label("year"),
-                func.count(Credit.id).label("issuance_count"),
-                func.sum(Credit.body).label("issuance_sum"),
-            )
-            .where(func.extract("year", Credit.issuance_date) == year)
-            .group_by("month", "year")
-            .subquery()
+    async def get_stats_range(
+        self,
+        from_month: YearMonth,
+        to_month: YearMonth,
+        issuance_id: int,
+        collection_id: int,
+        after: Optional[YearMonth] = None,
+        limit: int = 120,
+    ):
+        """Every month of an inclusive (year, month) range, paged by (year, month)."""
+        q = self._stats_query(from_month, to_month, issuance_id, collection_id)
+        if after is not None:
+            q = q.where(tuple_(MonthlyRollup.year, MonthlyRollup.month) > after)
+        return await self.session.execute(q.limit(limit))
+
+    @staticmethod
+    def _stats_query(
+        from_month: YearMonth,
+        to_month: YearMonth,
+        issuance_id: int,
+        collection_id: int,
+    ) -> Select:
+        (from_year, first_month), (to_year, last_month) = from_month, to_month
+        period_start = date(from_year, first_month, 1)
+        period_end = (
+            date(to_year + 1, 1, 1)
+            if last_month == 12
+            else date(to_year, last_month + 1, 1)
         )
-        year_credits_subq = (
+
+        # shares of the year are taken against whole years, even at the range edges
+        year_subq = (
             select(
-                func.extract("year", Credit.issuance_date).label("year"),
-                func.sum(Credit.body).label("issuance_sum"),
+                MonthlyRollup.year,
+                func.sum(MonthlyRollup.issuance_sum).label("issuance_sum"),
+                func.sum(MonthlyRollup.collection_sum).label("collection_sum"),
             )
-            .where(func.extract("year", Credit.issuance_date) == year)
-            .group_by("year")
+            .where(MonthlyRollup.year.between(from_year, to_year))
+            .group_by(MonthlyRollup.year)
             .subquery()
         )
-        pay_subq = (
+        plans_subq = (
             select(
-                func.extract("month", Payment.payment_date).label("month"),
-                func.extract("year", Payment.payment_date).label("year"),
-                func.count(Payment.id).label("collection_count"),
-                func.sum(Payment.sum).label("collection_sum"),
+                func.extract("year", Plan.period).label("year"),
+                func.extract("month", Plan.period).label("month"),
+                func.sum(case((Plan.category_id == issuance_id, Plan.sum))).label(
+                    "issuance_sum"
+                ),
+                func.sum(case((Plan.category_id == collection_id, Plan.sum))).label(
+                    "collection_sum"
+                ),
             )
-            .where(func.extract("year", Payment.payment_date) == year)
-            .group_by("month", "year")
-            .subquery()
-        )
-        year_pay_subq = (
-            select(
-                func.extract("year", Payment.payment_date).label("year"),
-                func.sum(Payment.sum).label("collection_sum"),
+            .where(
+                Plan.period >= period_start,
+                Plan.period < period_end,
+                Plan.category_id.in_([issuance_id, collection_id]),
             )
-            .where(func.extract("year", Payment.payment_date) == year)
-            .group_by("year")
+            .group_by("year", "month")
             .subquery()
         )
 
-        PlanCat3 = aliased(Plan)
-        PlanCat4 = aliased(Plan)
+        plan_issuance_sum = func.coalesce(plans_subq.c.issuance_sum, 0)
+        plan_collection_sum = func.coalesce(plans_subq.c.collection_sum, 0)
+        year_month = tuple_(MonthlyRollup.year, MonthlyRollup.month)
 
-        q = (
+        return (
             select(
-                credits_subq.c.month,
-                credits_subq.c.year,
-                credits_subq.c.issuance_count,
-                credits_subq.c.issuance_sum,
-                pay_subq.c.collection_count,
-                pay_subq.c.collection_sum,
-                func.coalesce(PlanCat3.sum, 0).label("plan_issuance_sum"),
-                func.coalesce(PlanCat4.sum, 0).label("plan_collection_sum"),
-                (
-                    (func.coalesce(PlanCat3.sum, 0) / credits_subq.c.issuance_sum) * 100
-                ).label("pct_issuance_plan"),
-                (
-                    (func.coalesce(PlanCat4.sum, 0) / pay_subq.c.collection_sum) * 100
-                ).label("pct_collection_plan"),
-                (
-                    (
-                        func.coalesce(credits_subq.c.issuance_sum, 0)
-                        / year_credits_subq.c.issuance_sum
-                    )
-                    * 100
-                ).label("pct_issuance_year"),
-                (
-                    (
-                        func.coalesce(pay_subq.c.collection_sum, 0)
-                        / year_pay_subq.c.collection_sum
-                    )
-                    * 100
-                ).label("pct_collection_year"),
-            )
-            .join(
-                PlanCat3,
-                and_(
-                    func.extract("year", PlanCat3.period) == credits_subq.c.year,
-                    func.extract("month", PlanCat3.period) == credits_subq.c.month,
-                    PlanCat3.category_id == 3,
+                MonthlyRollup.month,
+                MonthlyRollup.year,
+                MonthlyRollup.issuance_count,
+                MonthlyRollup.issuance_sum,
+                MonthlyRollup.collection_count,
+                MonthlyRollup.collection_sum,
+                plan_issuance_sum.label("plan_issuance_sum"),
+                plan_collection_sum.label("plan_collection_sum"),
+                pct(plan_issuance_sum, MonthlyRollup.issuance_sum).label(
+                    "pct_issuance_plan"
                 ),
-                isouter=True,
-            )
-            .join(
-                PlanCat4,
-                and_(
-                    func.extract("year", PlanCat4.period) == credits_subq.c.year,
-                    func.extract("month", PlanCat4.period) == credits_subq.c.month,
-                    PlanCat4.category_id == 4,
+                pct(plan_collection_sum, MonthlyRollup.collection_sum).label(
+                    "pct_collection_plan"
                 ),
-                isouter=True,
-            )
-            .join(
-                pay_subq,
-                and_(
-                    pay_subq.c.year == credits_subq.c.year,
-                    pay_subq.c.month == credits_subq.c.month,
+                pct(MonthlyRollup.issuance_sum, year_subq.c.issuance_sum).label(
+                    "pct_issuance_year"
+                ),
+                pct(MonthlyRollup.collection_sum, year_subq.c.collection_sum).label(
+                    "pct_collection_year"
                 ),
-                isouter=True,
             )
             .join(
-                year_credits_subq,
-                year_credits_subq.c.year == credits_subq.c.year,
+                plans_subq,
+                (plans_subq.c.year == MonthlyRollup.year)
+                & (plans_subq.c.month == MonthlyRollup.month),
                 isouter=True,
             )
-            .join(
-                year_pay_subq,
-                year_pay_subq.c.year == credits_subq.c.year,
-                isouter=True,
+            .join(year_subq, year_subq.c.year == MonthlyRollup.year)
+            .where(
+                year_month >= from_month,
+                year_month <= to_month,
+                MonthlyRollup.issuance_count > 0,
             )
-            .limit(limit)
-            .offset(offset)
+            .order_by(MonthlyRollup.year, MonthlyRollup.month)
         )
-
-        return await self.session.execute(q)
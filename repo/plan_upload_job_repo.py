@@ -0,0 +1,96 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import instrument_repo
+from db.plan_upload_job_model import PlanUploadJob
+
+QUEUED = "queued"
+VALIDATING = "validating"
+INSERTING = "inserting"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+IN_PROGRESS = (VALIDATING, INSERTING)
+
+
+@instrument_repo
+class PlanUploadJobRepo:
+    """Job rows; every method commits, progress must be visible while a job runs."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, filename: Optional[str], path: str) -> PlanUploadJob:
+        job = PlanUploadJob(filename=filename, path=path, status=QUEUED)
+        self.session.add(job)
+        await self.session.commit()
+        return job
+
+    async def get(self, job_id: int) -> Optional[PlanUploadJob]:
+        return await self.session.get(PlanUploadJob, job_id)
+
+    async def claim(self, job_id: int, owner: str) -> bool:
+        """Moves a queued job to validating, False when someone else got it first."""
+        result = await self.session.execute(
+            update(PlanUploadJob)
+            .where(PlanUploadJob.id == job_id, PlanUploadJob.status == QUEUED)
+            .values(status=VALIDATING, owner=owner, heartbeat_at=datetime.now())
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def heartbeat(self, job_id: int, owner: str) -> bool:
+        """False once the job is no longer running under `owner`."""
+        result = await self.session.execute(
+            update(PlanUploadJob)
+            .where(
+                PlanUploadJob.id == job_id,
+                PlanUploadJob.owner == owner,
+                PlanUploadJob.status.in_(IN_PROGRESS),
+            )
+            .values(heartbeat_at=datetime.now())
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def set(self, job_id: int, owner: str, **values) -> None:
+        # a requeued job belongs to its next owner, the old one must not report on it
+        await self.session.execute(
+            update(PlanUploadJob)
+            .where(PlanUploadJob.id == job_id, PlanUploadJob.owner == owner)
+            .values(**values)
+        )
+        await self.session.commit()
+
+    async def requeue_stale(self, heartbeat_before: datetime) -> int:
+        """Queues again the jobs of a process that stopped mid-run."""
+        # no heartbeat at all: started before heartbeats were recorded
+        return await self._requeue(
+            or_(
+                PlanUploadJob.heartbeat_at < heartbeat_before,
+                PlanUploadJob.heartbeat_at.is_(None),
+            )
+        )
+
+    async def requeue_owned(self, owner: str) -> int:
+        """Queues again the jobs `owner` was running when it stopped."""
+        return await self._requeue(PlanUploadJob.owner == owner)
+
+    async def _requeue(self, condition) -> int:
+        result = await self.session.execute(
+            update(PlanUploadJob)
+            .where(PlanUploadJob.status.in_(IN_PROGRESS), condition)
+            .values(status=QUEUED, processed_rows=0, owner=None, heartbeat_at=None)
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def get_queued_ids(self) -> list[int]:
+        result = await self.session.execute(
+            select(PlanUploadJob.id)
+            .where(PlanUploadJob.status == QUEUED)
+            .order_by(PlanUploadJob.id)
+        )
+        return list(result.scalars().all())
@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+from typing import Sequence
+
+import sqlalchemy.exc
+from sqlalchemy import Row, case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import instrument_repo
+from db.credits_model import Credit
+from db.payments_model import Payment
+from logs.config.logging_config import logger
+
+
+def not_negative(value):
+    return case((value > 0, value), else_=0)
+
+
+@instrument_repo
+class PortfolioRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_aging(
+        self,
+        as_of: date,
+        body_type_id: int,
+        percent_type_id: int,
+        bucket_starts: Sequence[int],
+    ) -> Sequence[Row]:
+        """
+        Credits open on `as_of` grouped by how many days they are overdue, with what
+        is left of their body and percent after the payments made up to that day.
+        `bucket_starts` are the ascending lower bounds of the buckets in days, a row's
+        `bucket` is the index of the last bound it reaches.
+        """
+        if body_type_id <= 0 or percent_type_id <= 0:
+            raise ValueError("Type id must be a positive value")
+        # compare return dates with precomputed cutoffs, so no per-row date math
+        bucket = case(
+            *(
+                (Credit.return_date <= as_of - timedelta(days=start), index)
+                for index, start in reversed(list(enumerate(bucket_starts)))
+                if index > 0
+            ),
+            else_=0,
+        )
+        open_credits = (
+            select(
+                Credit.id,
+                func.coalesce(Credit.body, 0).label("body"),
+                func.coalesce(Credit.percent, 0).label("percent"),
+                bucket.label("bucket"),
+            )
+            .where(
+                Credit.issuance_date <= as_of,
+                or_(
+                    Credit.actual_return_date.is_(None),
+                    Credit.actual_return_date > as_of,
+                ),
+            )
+            .cte("open_credits")
+        )
+        paid = (
+            select(
+                Payment.credit_id,
+                func.sum(case((Payment.type_id == body_type_id, Payment.sum))).label(
+                    "body_paid"
+                ),
+                func.sum(case((Payment.type_id == percent_type_id, Payment.sum))).label(
+                    "percent_paid"
+                ),
+            )
+            .join(open_credits, open_credits.c.id == Payment.credit_id)
+            .where(Payment.payment_date <= as_of)
+            .group_by(Payment.credit_id)
+            .subquery()
+        )
+        outstanding_body = not_negative(
+            open_credits.c.body - func.coalesce(paid.c.body_paid, 0)
+        )
+        outstanding_percent = not_negative(
+            open_credits.c.percent - func.coalesce(paid.c.percent_paid, 0)
+        )
+        try:
+            result = await self.session.execute(
+                select(
+                    open_credits.c.bucket,
+                    func.count().label("credits_count"),
+                    func.sum(outstanding_body).label("outstanding_body"),
+                    func.sum(outstanding_percent).label("outstanding_percent"),
+                )
+                .select_from(open_credits)
+                .outerjoin(paid, paid.c.credit_id == open_credits.c.id)
+                .group_by(open_credits.c.bucket)
+                .order_by(open_credits.c.bucket)
+            )
+            return result.all()
+        except sqlalchemy.exc.SQLAlchemyError as e:
+            logger.error(f"Database error getting portfolio aging on {as_of}: {e}")
+            raise
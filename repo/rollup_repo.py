@@ -0,0 +1,110 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Mapping
+
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import instrument_repo
+from db.credits_model import Credit
+from db.payments_model import Payment
+from db.rollups_model import DailyRollup, MonthlyRollup
+
+ISSUANCE = "issuance"
+COLLECTION = "collection"
+
+RollupDeltas = Mapping[date, tuple[int, Decimal]]
+
+
+@instrument_repo
+class RollupRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_issuance(self, deltas: RollupDeltas) -> None:
+        await self._add(ISSUANCE, deltas)
+
+    async def add_collection(self, deltas: RollupDeltas) -> None:
+        await self._add(COLLECTION, deltas)
+
+    async def _add(self, kind: str, deltas: RollupDeltas) -> None:
+        if not deltas:
+            return
+        count_col, sum_col = f"{kind}_count", f"{kind}_sum"
+
+        monthly: dict[tuple[int, int], tuple[int, Decimal]] = defaultdict(
+            lambda: (0, Decimal(0))
+        )
+        for day, (count, total) in deltas.items():
+            month_count, month_total = monthly[(day.year, day.month)]
+            monthly[(day.year, day.month)] = (month_count + count, month_total + total)
+
+        # sorted keys keep the row lock order stable between concurrent loaders
+        daily_rows = [
+            {"day": day, count_col: count, sum_col: total}
+            for day, (count, total) in sorted(deltas.items())
+        ]
+        monthly_rows = [
+            {"year": year, "month": month, count_col: count, sum_col: total}
+            for (year, month), (count, total) in sorted(monthly.items())
+        ]
+
+        for model, rows in ((DailyRollup, daily_rows), (MonthlyRollup, monthly_rows)):
+            stmt = mysql_insert(model)
+            stmt = stmt.on_duplicate_key_update(
+                {
+                    count_col: getattr(model, count_col) + stmt.inserted[count_col],
+                    sum_col: getattr(model, sum_col) + stmt.inserted[sum_col],
+                }
+            )
+            await self.session.execute(stmt, rows)
+
+    async def rebuild(self) -> None:
+        credits_q = select(
+            Credit.issuance_date.label("day"),
+            func.count(Credit.id).label("issuance_count"),
+            func.coalesce(func.sum(Credit.body), 0).label("issuance_sum"),
+            literal(0).label("collection_count"),
+            literal(0).label("collection_sum"),
+        ).group_by(Credit.issuance_date)
+        payments_q = select(
+            Payment.payment_date.label("day"),
+            literal(0).label("issuance_count"),
+            literal(0).label("issuance_sum"),
+            func.count(Payment.id).label("collection_count"),
+            func.sum(Payment.sum).label("collection_sum"),
+        ).group_by(Payment.payment_date)
+        by_day = union_all(credits_q, payments_q).subquery()
+
+        daily_q = select(
+            by_day.c.day,
+            func.sum(by_day.c.issuance_count),
+            func.sum(by_day.c.issuance_sum),
+            func.sum(by_day.c.collection_count),
+            func.sum(by_day.c.collection_sum),
+        ).group_by(by_day.c.day)
+        monthly_q = select(
+            func.extract("year", DailyRollup.day).label("year"),
+            func.extract("month", DailyRollup.day).label("month"),
+            func.sum(DailyRollup.issuance_count),
+            func.sum(DailyRollup.issuance_sum),
+            func.sum(DailyRollup.collection_count),
+            func.sum(DailyRollup.collection_sum),
+        ).group_by("year", "month")
+
+        columns = [
+            "issuance_count",
+            "issuance_sum",
+            "collection_count",
+            "collection_sum",
+        ]
+        await self.session.execute(delete(MonthlyRollup))
+        await self.session.execute(delete(DailyRollup))
+        await self.session.execute(
+            insert(DailyRollup).from_select(["day", *columns], daily_q)
+        )
+        await self.session.execute(
+            insert(MonthlyRollup).from_select(["year", "month", *columns], monthly_q)
+        )
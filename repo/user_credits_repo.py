@@ -1,82 +1,102 @@
-from decimal import Decimal
 from typing import Sequence, Optional
 
-from sqlalchemy import select, func
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, Select, select, func
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 import sqlalchemy.exc
 
 
-from db import Dictionary
+from core.config import settings
+from core.metrics import instrument_repo
+from db.credit_balances_model import CreditBalance
 from db.credits_model import Credit
-from db.payments_model import Payment
 from db.users_model import User
 from logs.config.logging_config import logger
 
 
+@instrument_repo
 class UserCreditRepo:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_user_credits(self, user_id: int) -> Sequence[Credit]:
-
-        if user_id <= 0:
-            raise ValueError("User id must be a positive value")
+    async def get_user_credits(
+        self,
+        user_id: int,
+        after_credit_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Sequence[Row]:
         try:
             res = await self.session.execute(
-                select(Credit).where(Credit.user_id == user_id)
+                self._user_credits_query(user_id, after_credit_id, limit)
             )
-            return res.scalars().all()
+            return res.all()
         except sqlalchemy.exc.SQLAlchemyError as e:
             logger.error(f"Database error getting credits for user {user_id}: {e}")
             raise
 
-    async def get_credit_total_payments(self, credit_id: int) -> Decimal:
-
-        if credit_id <= 0:
-            raise ValueError("Credit id must be a positive value")
-        try:
-            res = await self.session.execute(
-                select(func.sum(Payment.sum)).where(Payment.credit_id == credit_id)
-            )
-            result = res.scalar()
+    async def stream_user_credits(
+        self,
+        user_id: int,
+        after_credit_id: Optional[int] = None,
+    ) -> AsyncResult:
+        """Same rows as `get_user_credits`, read lazily from a server-side cursor."""
+        query = self._user_credits_query(user_id, after_credit_id).execution_options(
+            yield_per=settings.user_credits_batch_size
+        )
+        return await self.session.stream(query)
 
-            if result is None:
-                return Decimal("0.0")
-            if not isinstance(result, Decimal):
-                return Decimal(str(result))
-            return result
-        except sqlalchemy.exc.SQLAlchemyError as e:
-            logger.error(
-                f"Database error fetching total payments for credit {credit_id}: {e}"
-            )
-            raise
+    def _user_credits_query(
+        self,
+        user_id: int,
+        after_credit_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Select:
+        if user_id <= 0:
+            raise ValueError("User id must be a positive value")
+        q = (
+            self._credits_summary_query()
+            .where(Credit.user_id == user_id)
+            .order_by(Credit.id)
+        )
+        # keyset pagination: seek past the last credit id instead of OFFSET
+        if after_credit_id is not None:
+            q = q.where(Credit.id > after_credit_id)
+        if limit is not None:
+            q = q.limit(limit)
+        return q
 
-    async def get_credit_payments_by_type(
-        self, credit_id: int, type_id: int
-    ) -> Decimal:
+    async def get_users_credits(self, user_ids: Sequence[int]) -> Sequence[Row]:
 
-        if credit_id <= 0:
-            raise ValueError("Credit id must be a positive value")
-        if type_id <= 0:
-            raise ValueError("Type id must be a positive value")
+        if not user_ids:
+            return []
         try:
             res = await self.session.execute(
-                select(func.sum(Payment.sum)).where(
-                    Payment.credit_id == credit_id, Payment.type_id == type_id
-                )
+                self._credits_summary_query()
+                .add_columns(Credit.user_id)
+                .where(Credit.user_id.in_(user_ids))
+                .order_by(Credit.user_id, Credit.id)
             )
-            result = res.scalar()
-            if result is None:
-                return Decimal("0.0")
-            if not isinstance(result, Decimal):
-                return Decimal(str(result))
-            return result
+            return res.all()
         except sqlalchemy.exc.SQLAlchemyError as e:
             logger.error(
-                f"Database error fetching payments by type for credit {credit_id}, type {type_id}: {e}"
+                f"Database error getting credits for {len(user_ids)} users: {e}"
             )
             raise
 
+    @staticmethod
+    def _credits_summary_query() -> Select:
+        # payments come pre-summed per credit, a credit without any has no balance
+        return select(
+            Credit.id.label("credit_id"),
+            Credit.issuance_date,
+            Credit.return_date,
+            Credit.actual_return_date,
+            Credit.body,
+            Credit.percent,
+            func.coalesce(CreditBalance.total_paid, 0).label("total_payments"),
+            func.coalesce(CreditBalance.body_paid, 0).label("body_payments"),
+            func.coalesce(CreditBalance.percent_paid, 0).label("percent_payments"),
+        ).outerjoin(CreditBalance, CreditBalance.credit_id == Credit.id)
+
     async def is_user_exists(self, user_id: int) -> bool:
 
         if user_id <= 0:
@@ -88,14 +108,34 @@ class UserCreditRepo:
             logger.error(f"Database error checking if user {user_id} exists: {e}")
             raise
 
-    async def get_payment_type_id(self, name: str) -> Optional[int]:
-        if not name or not name.strip():
-            raise ValueError("Payment type name must be non-empty")
+    async def get_existing_user_ids(self, user_ids: Sequence[int]) -> list[int]:
+        if not user_ids:
+            return []
         try:
             res = await self.session.execute(
-                select(Dictionary.id).where(Dictionary.name == name)
+                select(User.id).where(User.id.in_(user_ids)).order_by(User.id)
             )
-            return res.scalar_one_or_none()
+            return list(res.scalars().all())
         except sqlalchemy.exc.SQLAlchemyError as e:
-            logger.error(f"Database error getting payment type id for '{name}': {e}")
+            logger.error(f"Database error checking {len(user_ids)} users exist: {e}")
+            raise
+
+    async def get_user_ids_in_range(
+        self, from_user_id: int, to_user_id: int, limit: int
+    ) -> list[int]:
+        if from_user_id <= 0 or to_user_id <= 0:
+            raise ValueError("User id must be a positive value")
+        try:
+            res = await self.session.execute(
+                select(User.id)
+                .where(User.id >= from_user_id, User.id <= to_user_id)
+                .order_by(User.id)
+                .limit(limit)
+            )
+            return list(res.scalars().all())
+        except sqlalchemy.exc.SQLAlchemyError as e:
+            logger.error(
+                f"Database error getting users in range "
+                f"{from_user_id}..{to_user_id}: {e}"
+            )
             raise
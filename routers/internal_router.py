@@ -0,0 +1,55 @@
+from fastapi import APIRouter, HTTPException, status
+
+from db import connection
+from schemas.ledger_export_schema import LedgerExportStatusResponse
+from schemas.pool_stats_schema import PoolStatsResponse, ReplicaStatusResponse
+from services.ledger_export_service import ledger_exports
+
+internal_router = APIRouter(tags=["Internal"], prefix="/internal")
+
+
+@internal_router.get(
+    "/pool",
+    status_code=status.HTTP_200_OK,
+    response_model=PoolStatsResponse,
+    description="Connection pool usage: checked-out and idle connections, overflow "
+    "and checkout wait times since startup",
+)
+async def get_pool_stats():
+    return connection.engine.sync_engine.pool.snapshot()
+
+
+@internal_router.get(
+    "/replica",
+    status_code=status.HTTP_200_OK,
+    response_model=ReplicaStatusResponse,
+    description="Whether reads currently go to the replica, and its last measured lag",
+)
+async def get_replica_status():
+    return connection.replica_router.snapshot()
+
+
+@internal_router.post(
+    "/exports",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=LedgerExportStatusResponse,
+    description="Starts the Parquet export of `make export_ledger` in the background, "
+    "`full=true` rewrites everything. 409 while an export is running",
+)
+async def start_ledger_export(full: bool = False):
+    if not ledger_exports.start(full):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An export is already running.",
+        )
+    return ledger_exports.status()
+
+
+@internal_router.get(
+    "/exports",
+    status_code=status.HTTP_200_OK,
+    response_model=LedgerExportStatusResponse,
+    description="Whether an export is running, and what the last one wrote",
+)
+async def get_ledger_export_status():
+    return ledger_exports.status()
@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics import render_metrics
+from db import connection
+
+metrics_router = APIRouter(tags=["Internal"])
+
+POOL_GAUGES = {
+    "checked_out": "Connections currently checked out of the pool.",
+    "idle": "Idle connections kept in the pool.",
+    "overflow": "Connections opened above the pool size.",
+    "waiting": "Callers waiting for a pooled connection.",
+}
+
+
+@metrics_router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+)
+async def get_metrics():
+    pool = connection.engine.sync_engine.pool
+    snapshot = pool.snapshot() if hasattr(pool, "snapshot") else {}
+    pool_lines = []
+    for key, documentation in POOL_GAUGES.items():
+        if key in snapshot:
+            pool_lines += [
+                f"# HELP db_pool_{key} {documentation}",
+                f"# TYPE db_pool_{key} gauge",
+                f"db_pool_{key} {snapshot[key]}",
+            ]
+    return PlainTextResponse(
+        render_metrics(pool_lines), media_type="text/plain; version=0.0.4"
+    )
@@ -4,9 +4,11 @@ from fastapi import APIRouter, UploadFile
 from fastapi.params import Depends
 from starlette import status
 
-from core.deps import get_plan_insert_service
+from core.deps import get_plan_insert_service, get_plan_upload_job_service
 
+from schemas.plan_upload_job_schema import PlanUploadJobResponse
 from services.plan_insert_service import PlanService
+from services.plan_upload_jobs import PlanUploadJobService
 
 load_data_rout = APIRouter(
     tags=["Plan"],
@@ -18,7 +20,7 @@ load_data_rout = APIRouter(
     status_code=status.HTTP_200_OK,
     summary="Upload file with plan data",
     description="""
-Uploads an Excel file with plans for a new month <br>
+Uploads an Excel (`.xlsx`), `.csv` or `.parquet` file with plans for a new month <br>
 The file must contain the following columns:
 - `Mісяць плану`: date with the first day of the target month (e.g., 2025-09-01)
 - `Назва категорії плану` : (e.g. видача/збір)
@@ -30,4 +32,33 @@ async def plans_insert(
     file: UploadFile,
 ):
 
-    return await plan_service.load_file(file.file)
+    return await plan_service.load_file(file.file, file.filename)
+
+
+@load_data_rout.post(
+    "/plans_insert/jobs",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Upload file with plan data in the background",
+    description="Same file as `/plans_insert`, answered as soon as it is stored. "
+    "Validation and insert run in a background worker, poll "
+    "`/plans_insert/jobs/{job_id}` for progress and errors",
+    response_model=PlanUploadJobResponse,
+)
+async def plans_insert_job(
+    job_service: Annotated[PlanUploadJobService, Depends(get_plan_upload_job_service)],
+    file: UploadFile,
+):
+    return await job_service.create_job(file.file, file.filename)
+
+
+@load_data_rout.get(
+    "/plans_insert/jobs/{job_id}",
+    status_code=status.HTTP_200_OK,
+    summary="Get plan upload job status",
+    response_model=PlanUploadJobResponse,
+)
+async def get_plans_insert_job(
+    job_id: int,
+    job_service: Annotated[PlanUploadJobService, Depends(get_plan_upload_job_service)],
+):
+    return await job_service.get_job(job_id)
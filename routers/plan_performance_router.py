@@ -7,11 +7,11 @@ from starlette import status
 from services.plan_performance_service import PlanPerformanceService
 
 from core.deps import get_plan_performance_service
+from core.responses import FastJSONResponse
 
 from schemas.plan_performance_schema import PlanPerformanceResponse
 
-
-plan_perf_rout = APIRouter(tags=["Plan"])
+plan_perf_rout = APIRouter(tags=["Plan"], default_response_class=FastJSONResponse)
 
 
 @plan_perf_rout.get(
@@ -28,4 +28,4 @@ async def get_plans_performance(
         PlanPerformanceService, Depends(get_plan_performance_service)
     ],
 ):
-    return await plan_perf_service.get_performance(target_date)
+    return FastJSONResponse(await plan_perf_service.get_performance(target_date))
@@ -0,0 +1,31 @@
+from datetime import date
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends
+from starlette import status
+
+from core.deps import get_portfolio_service
+from core.responses import FastJSONResponse
+from schemas.portfolio_schema import PortfolioAgingResponse
+from services.portfolio_service import PortfolioService
+
+portfolio_router = APIRouter(
+    tags=["Portfolio"], prefix="/portfolio", default_response_class=FastJSONResponse
+)
+
+
+@portfolio_router.get(
+    "/aging",
+    status_code=status.HTTP_200_OK,
+    summary="Get portfolio aging",
+    description="Credits open on `as_of` (today by default) grouped into 0-30, 31-90, "
+    "91-180 and 180+ days overdue, with the body and percent still outstanding "
+    "after the payments made up to that day<br>"
+    "The date must be in the format: `YYYY-MM-DD`",
+    response_model=PortfolioAgingResponse,
+)
+async def get_portfolio_aging(
+    portfolio_service: Annotated[PortfolioService, Depends(get_portfolio_service)],
+    as_of: Optional[date] = None,
+):
+    return FastJSONResponse(await portfolio_service.get_aging(as_of or date.today()))
@@ -1,23 +1,75 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
 
+from core.arrow import ARROW_STREAM_MEDIA_TYPE, ResponseFormat
 from core.deps import get_user_credits_service
+from core.responses import FastJSONResponse
+from schemas.credits_info_schema import UserCreditsBatchReq
 
 from services.user_credits_service import UserCreditService
 
-user_credits = APIRouter(tags=["User credits"], prefix="/user_credits")
+user_credits = APIRouter(
+    tags=["User credits"],
+    prefix="/user_credits",
+    default_response_class=FastJSONResponse,
+)
+
+MAX_CREDITS_PAGE = 1000
+
+
+@user_credits.post(
+    "/batch",
+    response_class=StreamingResponse,
+    description="Get credits of many users as NDJSON, one user document per line<br>"
+    "Pass either `user_ids` or the inclusive `from_user_id`/`to_user_id` range. "
+    "Unknown user ids are skipped. "
+    "`format=arrow` sends an Arrow IPC stream instead, one row per credit with "
+    "its `user_id`, so users without credits do not appear",
+)
+async def get_users_credits_batch(
+    batch: UserCreditsBatchReq,
+    user_credits_service: Annotated[
+        UserCreditService, Depends(get_user_credits_service)
+    ],
+    response_format: Annotated[ResponseFormat, Query(alias="format")] = "json",
+):
+    if response_format == "arrow":
+        body = await user_credits_service.stream_users_credits_arrow(batch)
+        return StreamingResponse(body, media_type=ARROW_STREAM_MEDIA_TYPE)
+    lines = await user_credits_service.stream_users_credits(batch)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 
 @user_credits.get(
     "/{user_id}",
-    description="Get all user credits",
+    description="Get all user credits<br>"
+    "Pass `limit` to page through credits ordered by id, then the returned "
+    "`next_cursor` as `after` for the following page. "
+    "`stream=true` sends the whole list as it is read from the database "
+    "and cannot be combined with `limit`",
 )
 async def get_user_credits(
     user_id: int,
     user_credits_service: Annotated[
         UserCreditService, Depends(get_user_credits_service)
     ],
+    after: Annotated[Optional[int], Query(ge=0)] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=MAX_CREDITS_PAGE)] = None,
+    stream: bool = False,
 ):
-    return await user_credits_service.get_all_user_credits(user_id)
+    if stream:
+        if limit is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'limit' cannot be combined with 'stream=true'",
+            )
+        body = await user_credits_service.stream_user_credits(user_id, after)
+        return StreamingResponse(body, media_type="application/json")
+    return FastJSONResponse(
+        await user_credits_service.get_all_user_credits(
+            user_id, after=after, limit=limit
+        )
+    )
@@ -1,15 +1,27 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
 
+from core.arrow import ARROW_STREAM_MEDIA_TYPE, ResponseFormat
 from core.deps import get_year_performance_service
+from core.responses import FastJSONResponse
 
 
-from schemas.plan_performance_schema import YearPerformanceResponse
+from schemas.plan_performance_schema import (
+    YearPerformanceRangeResponse,
+    YearPerformanceResponse,
+)
+from services.year_rerformance_servise import YearPerformanceService
 
+year_performance_router = APIRouter(
+    tags=["Plan"], default_response_class=FastJSONResponse
+)
 
-year_performance_router = APIRouter(tags=["Plan"])
+YEAR_MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+# years are queried as half-open ranges ending on January 1 of the next year
+MIN_YEAR, MAX_YEAR = 1, 9998
+MAX_RANGE_PAGE = 1200
 
 
 @year_performance_router.get(
@@ -17,16 +29,68 @@ year_performance_router = APIRouter(tags=["Plan"])
     summary="Get year performance by year",
     response_model=list[YearPerformanceResponse],
     description="Get information about the performance of plans for a specific year<br>"
-    "The target year must be in the format: `YYYY`",
+    "The target year must be in the format: `YYYY`. "
+    "`format=arrow` returns the same rows as an Arrow IPC stream",
 )
 async def get_year_performance(
-    target_year: int,
+    target_year: Annotated[int, Query(ge=MIN_YEAR, le=MAX_YEAR)],
     year_perf_service: Annotated[
         YearPerformanceResponse, Depends(get_year_performance_service)
     ],
     limit: int = 12,
     offset: int = 0,
+    response_format: Annotated[ResponseFormat, Query(alias="format")] = "json",
+):
+    body = await year_perf_service.get_year_performance(
+        target_year, limit=limit, offset=offset, response_format=response_format
+    )
+    if response_format == "arrow":
+        return Response(body, media_type=ARROW_STREAM_MEDIA_TYPE)
+    return FastJSONResponse(body)
+
+
+@year_performance_router.get(
+    "/year_performance/range",
+    summary="Get performance for a range of months",
+    response_model=YearPerformanceRangeResponse,
+    description="Every month of an inclusive range in chronological order<br>"
+    "Pass either `from_year`/`to_year` or `from_month`/`to_month` as `YYYY-MM`. "
+    "Pass the returned `next_cursor` as `after` to get the following page",
+)
+async def get_range_performance(
+    year_perf_service: Annotated[
+        YearPerformanceService, Depends(get_year_performance_service)
+    ],
+    from_year: Annotated[Optional[int], Query(ge=MIN_YEAR, le=MAX_YEAR)] = None,
+    to_year: Annotated[Optional[int], Query(ge=MIN_YEAR, le=MAX_YEAR)] = None,
+    from_month: Annotated[Optional[str], Query(pattern=YEAR_MONTH_PATTERN)] = None,
+    to_month: Annotated[Optional[str], Query(pattern=YEAR_MONTH_PATTERN)] = None,
+    after: Annotated[Optional[str], Query(pattern=YEAR_MONTH_PATTERN)] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_RANGE_PAGE)] = 120,
 ):
-    return await year_perf_service.get_year_performance(
-        target_year, limit=limit, offset=offset
+    if from_month is not None and to_month is not None:
+        bounds = parse_year_month(from_month), parse_year_month(to_month)
+    elif from_year is not None and to_year is not None:
+        bounds = (from_year, 1), (to_year, 12)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass either from_year and to_year or from_month and to_month",
+        )
+    return FastJSONResponse(
+        await year_perf_service.get_range_performance(
+            *bounds,
+            after=parse_year_month(after) if after is not None else None,
+            limit=limit,
+        )
     )
+
+
+def parse_year_month(value: str) -> tuple[int, int]:
+    year, month = value.split("-")
+    if not MIN_YEAR <= int(year) <= MAX_YEAR:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Year must be between {MIN_YEAR} and {MAX_YEAR}",
+        )
+    return int(year), int(month)
@@ -1,7 +1,19 @@
-from typing import Optional
+from typing import Annotated, Optional
 from datetime import date
 from decimal import Decimal
-from pydantic import BaseModel
+import pyarrow as pa
+from fastapi.encoders import decimal_encoder
+from pydantic import (
+    BaseModel,
+    Field,
+    PlainSerializer,
+    PositiveInt,
+    TypeAdapter,
+    model_validator,
+)
+
+# JSON numbers exactly as `jsonable_encoder` writes them, without the extra pass
+JsonDecimal = Annotated[Decimal, PlainSerializer(decimal_encoder, when_used="json")]
 
 
 class CreditInfo(BaseModel):
@@ -10,16 +22,61 @@ class CreditInfo(BaseModel):
     closed: bool
 
     actual_return_date: Optional[date]
-    body: Decimal
-    percent: Decimal
-    total_payments: Optional[Decimal]
+    body: JsonDecimal
+    percent: JsonDecimal
+    total_payments: Optional[JsonDecimal]
 
     return_date: Optional[date]
     days_overdue: Optional[int]
-    body_payments: Optional[Decimal]
-    percent_payments: Optional[Decimal]
+    body_payments: Optional[JsonDecimal]
+    percent_payments: Optional[JsonDecimal]
 
 
 class UserCreditsRes(BaseModel):
     user_id: int
     credits: list[CreditInfo]
+    # credit id to pass as `after` for the next page, absent on the last page
+    next_cursor: Optional[int] = None
+
+
+class UserCreditsBatchReq(BaseModel):
+    user_ids: Optional[list[PositiveInt]] = Field(default=None, max_length=100_000)
+    from_user_id: Optional[PositiveInt] = None
+    to_user_id: Optional[PositiveInt] = None
+
+    @model_validator(mode="after")
+    def check_ids_or_range(self) -> "UserCreditsBatchReq":
+        has_range = self.from_user_id is not None or self.to_user_id is not None
+        if (self.user_ids is None) == (not has_range):
+            raise ValueError(
+                "Either 'user_ids' or 'from_user_id'/'to_user_id' must be given"
+            )
+        if has_range and (self.from_user_id is None or self.to_user_id is None):
+            raise ValueError("Both 'from_user_id' and 'to_user_id' are required")
+        if has_range and self.from_user_id > self.to_user_id:
+            raise ValueError("'from_user_id' must not be greater than 'to_user_id'")
+        return self
+
+
+user_credits_adapter = TypeAdapter(UserCreditsRes)
+
+MONEY = pa.decimal128(12, 2)
+MONEY_SUM = pa.decimal128(16, 2)
+
+# one row per credit, `CreditInfo` with the owner's id in front
+user_credits_arrow_schema = pa.schema(
+    [
+        ("user_id", pa.int64()),
+        ("credit_id", pa.int64()),
+        ("issuance_date", pa.date32()),
+        ("closed", pa.bool_()),
+        ("actual_return_date", pa.date32()),
+        ("body", MONEY),
+        ("percent", MONEY),
+        ("total_payments", MONEY_SUM),
+        ("return_date", pa.date32()),
+        ("days_overdue", pa.int32()),
+        ("body_payments", MONEY_SUM),
+        ("percent_payments", MONEY_SUM),
+    ]
+)
@@ -0,0 +1,11 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class LedgerExportStatusResponse(BaseModel):
+    running: bool
+    exported_at: Optional[str] = Field(description="end of the last finished table")
+    tables: dict[str, dict[str, int]] = Field(
+        description="last exported id, and rows or rewritten months, per table"
+    )
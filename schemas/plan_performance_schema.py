@@ -1,7 +1,9 @@
 from datetime import date
 from decimal import Decimal
+from typing import Optional
 
-from pydantic import BaseModel, Field, field_serializer
+import pyarrow as pa
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 class PlanPerformanceResponse(BaseModel):
@@ -26,18 +28,32 @@ class YearPerformanceResponse(BaseModel):
     pct_issuance_year: float
     pct_collection_year: float
 
-    @field_serializer("pct_issuance_plan")
-    def serialize_pct_issuance_plan(self, v: float) -> float:
-        return round(v, 2)
 
-    @field_serializer("pct_collection_plan")
-    def serialize_pct_collection_plan(self, v: float) -> float:
-        return round(v, 2)
-
-    @field_serializer("pct_issuance_year")
-    def serialize_pct_issuance_year(self, v: float) -> float:
-        return round(v, 2)
-
-    @field_serializer("pct_collection_year")
-    def serialize_pct_collection_year(self, v: float) -> float:
-        return round(v, 2)
+class YearPerformanceRangeResponse(BaseModel):
+    items: list[YearPerformanceResponse]
+    # `YYYY-MM` to pass as `after` for the next page, absent on the last page
+    next_cursor: Optional[str] = None
+
+
+plan_performance_adapter = TypeAdapter(list[PlanPerformanceResponse])
+year_performance_adapter = TypeAdapter(list[YearPerformanceResponse])
+year_performance_range_adapter = TypeAdapter(YearPerformanceRangeResponse)
+
+MONEY_SUM = pa.decimal128(16, 2)
+
+year_performance_arrow_schema = pa.schema(
+    [
+        ("month", pa.int8()),
+        ("year", pa.int16()),
+        ("issuance_count", pa.int64()),
+        ("plan_issuance_sum", MONEY_SUM),
+        ("issuance_sum", MONEY_SUM),
+        ("pct_issuance_plan", pa.float64()),
+        ("collection_count", pa.int64()),
+        ("plan_collection_sum", MONEY_SUM),
+        ("collection_sum", MONEY_SUM),
+        ("pct_collection_plan", pa.float64()),
+        ("pct_issuance_year", pa.float64()),
+        ("pct_collection_year", pa.float64()),
+    ]
+)
@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class PlanUploadJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    job_id: int = Field(validation_alias="id")
+    status: str = Field(
+        description="queued, validating, inserting, succeeded or failed"
+    )
+    filename: Optional[str]
+    total_rows: Optional[int] = Field(description="known once the file is validated")
+    processed_rows: int
+    inserted_rows: int
+    error: Optional[str] = Field(description="why the upload was rejected")
+    created_at: datetime
+    updated_at: datetime
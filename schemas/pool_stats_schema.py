@@ -0,0 +1,23 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class PoolStatsResponse(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    waiting: int
+    checkouts: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+
+class ReplicaStatusResponse(BaseModel):
+    configured: bool
+    healthy: bool
+    lag_seconds: Optional[float]
+    max_lag_seconds: float
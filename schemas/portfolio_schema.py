@@ -0,0 +1,23 @@
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import BaseModel, TypeAdapter
+
+
+class AgingBucket(BaseModel):
+    bucket: str
+    min_days_overdue: int
+    # absent for the open-ended last bucket
+    max_days_overdue: Optional[int] = None
+    credits_count: int
+    outstanding_body: Decimal
+    outstanding_percent: Decimal
+
+
+class PortfolioAgingResponse(BaseModel):
+    as_of: date
+    buckets: list[AgingBucket]
+
+
+portfolio_aging_adapter = TypeAdapter(PortfolioAgingResponse)
@@ -0,0 +1,295 @@
+import asyncio
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from typing import NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+
+from core.config import settings
+from repo.analytics_repo import AnalyticsRepo
+from repo.plan_repo import YearMonth
+
+# MySQL keeps four more digits than the dividend (scale 2) and rounds half up
+DIVISION_PLACES = Decimal("0.000001")
+PERCENT_PLACES = Decimal("0.01")
+
+
+class PlanPerformanceRow(NamedTuple):
+    period: date
+    category: str
+    plan_sum: Decimal
+    fact_sum: Decimal
+    percent: float
+
+
+class YearStatsRow(NamedTuple):
+    month: int
+    year: int
+    issuance_count: int
+    issuance_sum: Decimal
+    collection_count: int
+    collection_sum: Decimal
+    plan_issuance_sum: Decimal
+    plan_collection_sum: Decimal
+    pct_issuance_plan: Optional[float]
+    pct_collection_plan: Optional[float]
+    pct_issuance_year: Optional[float]
+    pct_collection_year: Optional[float]
+
+
+def to_decimal(cents) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def share(part: int, whole: int) -> Optional[float]:
+    """`round(part / whole * 100, 2)` as MySQL evaluates it, NULL for a zero whole."""
+    if whole == 0:
+        return None
+    ratio = (Decimal(int(part)) / Decimal(int(whole))).quantize(
+        DIVISION_PLACES, ROUND_HALF_UP
+    )
+    return float((ratio * 100).quantize(PERCENT_PLACES, ROUND_HALF_UP))
+
+
+def percent_of_plan(fact: int, plan: int) -> float:
+    """`round(fact * 100 / plan, 2)` as MySQL evaluates it, 0 without a plan."""
+    if plan <= 0:
+        return 0.0
+    ratio = (Decimal(int(fact) * 100) / Decimal(int(plan))).quantize(
+        DIVISION_PLACES, ROUND_HALF_UP
+    )
+    return float(ratio.quantize(PERCENT_PLACES, ROUND_HALF_UP))
+
+
+class DaySeries:
+    """Amounts in cents sorted by day, with running totals for range sums."""
+
+    def __init__(self):
+        self.days = np.empty(0, "datetime64[D]")
+        self.cents = np.empty(0, np.int64)
+        self.totals = np.zeros(1, np.int64)
+        self.last_id = 0
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def append(self, ids: np.ndarray, days: np.ndarray, cents: np.ndarray) -> None:
+        if not len(ids):
+            return
+        order = np.argsort(days, kind="stable")
+        days, cents = days[order], cents[order]
+        if len(self.days) and days[0] < self.days[-1]:
+            # back-dated rows, merge them in and recount the running totals
+            days = np.concatenate([self.days, days])
+            cents = np.concatenate([self.cents, cents])
+            order = np.argsort(days, kind="stable")
+            self.days, self.cents = days[order], cents[order]
+            self.totals = np.concatenate([[0], np.cumsum(self.cents)])
+        else:
+            self.days = np.concatenate([self.days, days])
+            self.cents = np.concatenate([self.cents, cents])
+            self.totals = np.concatenate(
+                [self.totals, self.totals[-1] + np.cumsum(cents)]
+            )
+        self.last_id = max(self.last_id, int(ids.max()))
+
+    def sum_between(self, first: np.datetime64, last: np.datetime64) -> int:
+        """Sum over the inclusive day range."""
+        lo = np.searchsorted(self.days, first, side="left")
+        hi = np.searchsorted(self.days, last, side="right")
+        return int(self.totals[hi] - self.totals[lo])
+
+    def by_month(
+        self, first_month: np.datetime64, months: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Row counts and sums of `months` consecutive months from `first_month`."""
+        bounds = (first_month + np.arange(months + 1)).astype("datetime64[D]")
+        idx = np.searchsorted(self.days, bounds, side="left")
+        return np.diff(idx), np.diff(self.totals[idx])
+
+
+async def read_columns(
+    result: AsyncResult,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ids, days, cents = [], [], []
+    async for rows in result.partitions():
+        ids.append(np.fromiter((row[0] for row in rows), np.int64, len(rows)))
+        days.append(np.array([row[1] for row in rows], "datetime64[D]"))
+        cents.append(np.fromiter((row[2] for row in rows), np.int64, len(rows)))
+    if not ids:
+        return (
+            np.empty(0, np.int64),
+            np.empty(0, "datetime64[D]"),
+            np.empty(0, np.int64),
+        )
+    return np.concatenate(ids), np.concatenate(days), np.concatenate(cents)
+
+
+class AnalyticsEngine:
+    """
+    Credits and payments held as day-sorted NumPy columns, so the plan and year
+    performance aggregates never reach MySQL. Built at startup and brought up to
+    date whenever the data generation moves forward: rows past the last loaded id are
+    appended, a table whose row count then does not add up is read again from
+    scratch. Every worker process keeps its own copy, about 16 bytes per credit
+    and payment.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.credits = DaySeries()
+        self.payments = DaySeries()
+        self.plans: list = []
+        self._plan_months = np.empty(0, np.int64)
+        self._plan_categories = np.empty(0, np.int64)
+        self._plan_cents = np.empty(0, np.int64)
+        self._loaded = False
+        self._generation: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(
+        self, session: AsyncSession, generation: Optional[int] = None
+    ) -> None:
+        repo = AnalyticsRepo(session)
+        self.credits = await self._sync(
+            self.credits, await repo.get_credits_state(), repo.stream_credits
+        )
+        self.payments = await self._sync(
+            self.payments, await repo.get_payments_state(), repo.stream_payments
+        )
+        self._set_plans(await repo.get_plans())
+        self._loaded = True
+        self._generation = generation
+
+    async def ensure_current(
+        self, session: AsyncSession, generation: Optional[int] = None
+    ) -> "AnalyticsEngine":
+        if self._is_stale(generation):
+            async with self._lock:
+                if self._is_stale(generation):
+                    await self.refresh(session, generation)
+        return self
+
+    def _is_stale(self, generation: Optional[int]) -> bool:
+        if not self._loaded:
+            return True
+        if generation is None or self._generation is None:
+            return generation != self._generation
+        # a replica trailing the primary reports an older generation and older
+        # rows, syncing to them would throw away what was already loaded
+        return generation > self._generation
+
+    @staticmethod
+    async def _sync(series: DaySeries, state: tuple[int, int], stream) -> DaySeries:
+        count, max_id = state
+        if max_id < series.last_id or count < len(series):
+            series = DaySeries()
+        ids, days, cents = await read_columns(await stream(series.last_id))
+        if len(series) and len(series) + len(ids) != count:
+            # rows were deleted, or committed below the last loaded id by loader
+            # chunks finishing out of order
+            series = DaySeries()
+            ids, days, cents = await read_columns(await stream(0))
+        series.append(ids, days, cents)
+        return series
+
+    def _set_plans(self, plans) -> None:
+        self.plans = list(plans)
+        self._plan_months = np.array(
+            [plan.period.year * 12 + plan.period.month - 1 for plan in self.plans],
+            np.int64,
+        )
+        self._plan_categories = np.array(
+            [plan.category_id or 0 for plan in self.plans], np.int64
+        )
+        self._plan_cents = np.array([plan.cents for plan in self.plans], np.int64)
+
+    def plan_performance(
+        self, target_date: date, issuance_id: int, collection_id: int
+    ) -> list[PlanPerformanceRow]:
+        """Same rows as `PlanRepo.get_performance`."""
+        period_start = target_date.replace(day=1)
+        first, last = np.datetime64(period_start, "D"), np.datetime64(target_date, "D")
+        facts = {
+            issuance_id: self.credits.sum_between(first, last),
+            collection_id: self.payments.sum_between(first, last),
+        }
+        rows = []
+        for plan in self.plans:
+            if plan.period != period_start or plan.category is None:
+                continue
+            fact = facts.get(plan.category_id, 0)
+            rows.append(
+                PlanPerformanceRow(
+                    period=plan.period,
+                    category=plan.category,
+                    plan_sum=to_decimal(plan.cents),
+                    fact_sum=to_decimal(fact),
+                    percent=percent_of_plan(fact, plan.cents),
+                )
+            )
+        return rows
+
+    def year_stats(
+        self,
+        from_month: YearMonth,
+        to_month: YearMonth,
+        issuance_id: int,
+        collection_id: int,
+        after: Optional[YearMonth] = None,
+        limit: int = 120,
+        offset: int = 0,
+    ) -> list[YearStatsRow]:
+        """Same rows as `PlanRepo.get_stats_range`, `offset` as in `get_stats`."""
+        from_year, to_year = from_month[0], to_month[0]
+        first = np.datetime64(f"{from_year:04d}-01", "M")
+        months = (to_year - from_year + 1) * 12
+        issuance_count, issuance_sum = self.credits.by_month(first, months)
+        collection_count, collection_sum = self.payments.by_month(first, months)
+        # shares of the year are taken against whole years, even at the range edges
+        year_issuance = issuance_sum.reshape(-1, 12).sum(axis=1)
+        year_collection = collection_sum.reshape(-1, 12).sum(axis=1)
+        plan_issuance = self._plan_sums(first, months, issuance_id)
+        plan_collection = self._plan_sums(first, months, collection_id)
+
+        rows = []
+        for i in np.flatnonzero(issuance_count > 0):
+            year_month = (from_year + int(i) // 12, int(i) % 12 + 1)
+            if not from_month <= year_month <= to_month:
+                continue
+            if after is not None and year_month <= after:
+                continue
+            rows.append(
+                YearStatsRow(
+                    month=year_month[1],
+                    year=year_month[0],
+                    issuance_count=int(issuance_count[i]),
+                    issuance_sum=to_decimal(issuance_sum[i]),
+                    collection_count=int(collection_count[i]),
+                    collection_sum=to_decimal(collection_sum[i]),
+                    plan_issuance_sum=to_decimal(plan_issuance[i]),
+                    plan_collection_sum=to_decimal(plan_collection[i]),
+                    pct_issuance_plan=share(plan_issuance[i], issuance_sum[i]),
+                    pct_collection_plan=share(plan_collection[i], collection_sum[i]),
+                    pct_issuance_year=share(issuance_sum[i], year_issuance[i // 12]),
+                    pct_collection_year=share(
+                        collection_sum[i], year_collection[i // 12]
+                    ),
+                )
+            )
+            if len(rows) == offset + limit:
+                break
+        return rows[offset:]
+
+    def _plan_sums(
+        self, first_month: np.datetime64, months: int, category_id: int
+    ) -> np.ndarray:
+        index = self._plan_months - (first_month.astype(np.int64) + 1970 * 12)
+        mask = (self._plan_categories == category_id) & (index >= 0) & (index < months)
+        sums = np.zeros(months, np.int64)
+        np.add.at(sums, index[mask], self._plan_cents[mask])
+        return sums
+
+
+analytics_engine = AnalyticsEngine(settings.analytics_engine_enabled)
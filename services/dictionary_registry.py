@@ -0,0 +1,64 @@
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from repo.dictionary_repo import DictionaryRepo
+
+BODY = "тіло"
+PERCENT = "відсотки"
+ISSUANCE = "видача"
+COLLECTION = "збір"
+
+
+class DictionaryRegistry:
+    """
+    In-memory copy of the `dictionary` table. Loaded at startup and reloaded when
+    it is older than `ttl` seconds or the data generation moved, so requests
+    resolve payment types and plan categories without querying.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._ids: dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._generation: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(
+        self, session: AsyncSession, generation: Optional[int] = None
+    ) -> None:
+        self._ids = await DictionaryRepo(session).get_ids_by_name()
+        self._loaded_at = time.monotonic()
+        self._generation = generation
+
+    async def ensure_loaded(
+        self, session: AsyncSession, generation: Optional[int] = None
+    ) -> "DictionaryRegistry":
+        if self._is_stale(generation):
+            async with self._lock:
+                if self._is_stale(generation):
+                    await self.refresh(session, generation)
+        return self
+
+    def _is_stale(self, generation: Optional[int]) -> bool:
+        if self._loaded_at is None:
+            return True
+        if generation is not None and generation != self._generation:
+            return True
+        return time.monotonic() - self._loaded_at > self.ttl
+
+    def id_of(self, name: str) -> int:
+        dictionary_id = self._ids.get(name)
+        if dictionary_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"'{name}' not found in dictionary.",
+            )
+        return dictionary_id
+
+
+dictionary_registry = DictionaryRegistry(settings.dictionary_ttl)
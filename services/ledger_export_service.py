@@ -0,0 +1,53 @@
+import asyncio
+from typing import Optional
+
+from core.config import settings
+from loader.ledger_export import LedgerExporter
+from logs.config.logging_config import logger
+
+
+class LedgerExports:
+    """
+    `python -m loader.ledger_export` run in the background of the API process, one
+    at a time, since two runs would write the same partitions and manifest.
+    """
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, full: bool) -> bool:
+        """False when an export is already running."""
+        if self.running:
+            return False
+        self._task = asyncio.create_task(self._run(full), name="ledger-export")
+        return True
+
+    async def stop(self) -> None:
+        if self.running:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def status(self) -> dict:
+        manifest = LedgerExporter(self.out_dir).read_manifest()
+        return {
+            "running": self.running,
+            "exported_at": manifest.get("exported_at"),
+            "tables": {
+                label: {k: v for k, v in table.items() if k != "months"}
+                for label, table in manifest.get("tables", {}).items()
+            },
+        }
+
+    async def _run(self, full: bool) -> None:
+        try:
+            await LedgerExporter(self.out_dir, full).export_all()
+        except Exception as e:
+            logger.error(f"Ledger export failed: {e}")
+
+
+ledger_exports = LedgerExports(settings.export_dir)
@@ -1,50 +1,147 @@
-from typing import BinaryIO, Callable, Any
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, BinaryIO, Callable, Optional
 
 from decimal import Decimal
 
 from fastapi import HTTPException
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 import pandas as pd
+from openpyxl import load_workbook
 from starlette.status import HTTP_409_CONFLICT, HTTP_400_BAD_REQUEST
 
-from db import Plan
+from core.config import settings
+from repo.data_generation_repo import DataGenerationRepo
 from repo.plan_repo import PlanRepo
+from services.dictionary_registry import COLLECTION, ISSUANCE, dictionary_registry
 
 SUM = "сума"
 PERIOD = "місяць плану"
 CATEGORY = "назва категорії плану"
-CATEGORY_ID = [3, 4]
 REQUIRED_COLUMNS = [SUM, PERIOD, CATEGORY]
 
+# parsing is CPU bound, keep it off the event loop and bound its concurrency
+parse_pool = ThreadPoolExecutor(
+    max_workers=settings.plan_parse_workers, thread_name_prefix="plan-parse"
+)
+
 
 class PlanService:
     def __init__(self, session: AsyncSession):
+        self.session = session
         self.repo = PlanRepo(session)
+        self.generation_repo = DataGenerationRepo(session)
+
+    async def load_file(self, file: BinaryIO, filename: Optional[str] = None):
+        plans = await self.prepare_plans(file, filename)
+        inserted = await self.insert_plans(plans)
+        return {"success": True, "inserted": inserted}
+
+    async def prepare_plans(
+        self, file: BinaryIO, filename: Optional[str] = None
+    ) -> list[dict]:
+        """Parses and validates a file, raising HTTPException for anything wrong."""
+        registry = await dictionary_registry.ensure_loaded(self.session)
+        category_ids = [registry.id_of(ISSUANCE), registry.id_of(COLLECTION)]
+        raw = await asyncio.get_running_loop().run_in_executor(
+            parse_pool, self._parse_and_validate, file, filename, category_ids
+        )
 
-    async def load_file(self, file: BinaryIO):
-        raw = pd.read_excel(file)
-        self._validate_all(raw)
-
-        periods_and_categories = self._extract_periods_categories(raw)
+        plans = self._build_plans(raw)
 
-        duplicates = await self.repo.check_exists(periods_and_categories)
+        duplicates = await self.repo.check_exists(
+            [
+                {"period": plan["period"], "category_id": plan["category_id"]}
+                for plan in plans
+            ]
+        )
         if duplicates:
-            dup_list = [{"period": d[0], "category_id": d[1]} for d in duplicates]
+            self._raise_duplicates(duplicates)
+        return plans
+
+    async def insert_plans(
+        self,
+        plans: list[dict],
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> int:
+        # chunks only bound the statement size, the whole file is one transaction
+        chunk_size = settings.plan_insert_chunk_size
+        try:
+            await self.generation_repo.bump()
+            for start in range(0, len(plans), chunk_size):
+                await self.repo.add_plans(
+                    plans[start : start + chunk_size], commit=False
+                )
+                if on_progress is not None:
+                    await on_progress(min(start + chunk_size, len(plans)))
+            await self.session.commit()
+        except IntegrityError:
+            # a concurrent upload won the race for the unique (period, category) key
             raise HTTPException(
                 status_code=HTTP_409_CONFLICT,
-                detail=f"Found already existing plans for: {dup_list}",
+                detail="Plans for these periods and categories were just inserted",
             )
+        return len(plans)
+
+    @staticmethod
+    def _raise_duplicates(duplicates):
+        dup_list = [{"period": d[0], "category_id": d[1]} for d in duplicates]
+        raise HTTPException(
+            status_code=HTTP_409_CONFLICT,
+            detail=f"Found already existing plans for: {dup_list}",
+        )
 
-        plans = self._build_plans(raw)
-        await self.repo.add_plans(plans)
-        return {"success": True, "inserted": len(plans)}
+    def _parse_and_validate(
+        self, file: BinaryIO, filename: Optional[str], category_ids: list[int]
+    ) -> pd.DataFrame:
+        raw = self.read_plan_file(file, filename)
+        self._validate_all(raw, category_ids)
+        return raw
+
+    @staticmethod
+    def read_plan_file(file: BinaryIO, filename: Optional[str]) -> pd.DataFrame:
+        extension = os.path.splitext(filename or "")[1].lower()
+        if extension in ("", ".xlsx", ".xlsm"):
+            return PlanService._read_xlsx(file)
+        if extension == ".csv":
+            return pd.read_csv(file, sep=None, engine="python")
+        if extension == ".parquet":
+            return pd.read_parquet(file)
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type '{extension}', "
+            f"expected .xlsx, .csv or .parquet",
+        )
 
-    def _validate_all(self, raw: pd.DataFrame):
+    @staticmethod
+    def _read_xlsx(file: BinaryIO) -> pd.DataFrame:
+        # read-only mode streams rows from the sheet XML instead of building every cell
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return pd.DataFrame()
+            columns = [
+                name if name is not None else f"Unnamed: {i}"
+                for i, name in enumerate(header)
+            ]
+            return pd.DataFrame.from_records(
+                (row for row in rows if any(value is not None for value in row)),
+                columns=columns,
+            )
+        finally:
+            workbook.close()
+
+    def _validate_all(self, raw: pd.DataFrame, category_ids: list[int]):
         self._validate_columns(raw)
         self._validate_sum(raw)
         self._validate_periods(raw)
-        self._validate_categories(raw)
+        self._validate_categories(raw, category_ids)
+        self._validate_unique(raw)
 
     def _validate_columns(self, raw: pd.DataFrame):
         missing = [col for col in REQUIRED_COLUMNS if col not in raw.columns]
@@ -84,38 +181,28 @@ class PlanService:
                 detail=f"First day of month must be 1, bad rows: {bad_rows}",
             )
 
-    def _validate_categories(self, raw: pd.DataFrame):
-        invalid = set(raw[CATEGORY].astype(int)) - set(CATEGORY_ID)
+    def _validate_categories(self, raw: pd.DataFrame, category_ids: list[int]):
+        invalid = set(raw[CATEGORY].astype(int)) - set(category_ids)
         if invalid:
             raise HTTPException(
                 status_code=HTTP_400_BAD_REQUEST,
-                detail=f"Invalid categories: {invalid}, must be in {CATEGORY_ID}",
+                detail=f"Invalid categories: {invalid}, must be in {category_ids}",
             )
 
-    def _extract_rows(
-        self, raw: pd.DataFrame, mapper: Callable[[Any, Any, Any], Any]
-    ) -> list:
-        result = []
-        for _, row in raw.iterrows():
-            period = row[PERIOD]
-            period = period.date() if hasattr(period, "date") else period
-            category_id = int(row[CATEGORY])
-            sum_val = row[SUM]
-            if pd.notnull(period) and pd.notnull(category_id):
-                result.append(mapper(period, category_id, sum_val))
-        return result
-
-    def _extract_periods_categories(self, raw: pd.DataFrame) -> list[tuple[str, int]]:
-        result = self._extract_rows(
-            raw, lambda period, category_id, sum_val: (str(period), category_id)
-        )
-        return result
-
-    def _build_plans(self, raw: pd.DataFrame) -> list[Plan]:
-        result = self._extract_rows(
-            raw,
-            lambda period, category_id, sum: Plan(
-                period=period, category_id=category_id, sum=Decimal(sum)
-            ),
-        )
-        return result
+    def _validate_unique(self, raw: pd.DataFrame):
+        repeated = raw.duplicated(subset=[PERIOD, CATEGORY], keep=False)
+        if repeated.any():
+            bad_rows = (raw[repeated].index + 2).tolist()
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail=f"Period and category must be unique, bad rows: {bad_rows}",
+            )
+
+    def _build_plans(self, raw: pd.DataFrame) -> list[dict]:
+        periods = raw[PERIOD].dt.date.tolist()
+        category_ids = raw[CATEGORY].astype(int).tolist()
+        sums = raw[SUM].round(2).astype(str).map(Decimal).tolist()
+        return [
+            {"period": period, "category_id": category_id, "sum": sum_val}
+            for period, category_id, sum_val in zip(periods, category_ids, sums)
+        ]
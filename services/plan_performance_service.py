@@ -1,36 +1,37 @@
-import calendar
 from datetime import date
 
+from core.cache import result_cache
+from core.config import settings
+from repo.data_generation_repo import DataGenerationRepo
 from repo.plan_repo import PlanRepo
+from schemas.plan_performance_schema import plan_performance_adapter
+from services.analytics_engine import analytics_engine
+from services.dictionary_registry import COLLECTION, ISSUANCE, dictionary_registry
 
 
 class PlanPerformanceService:
     def __init__(self, session):
+        self.session = session
         self.repo = PlanRepo(session)
+        self.generation_repo = DataGenerationRepo(session)
 
     async def get_performance(self, target_date: date):
+        generation = await self.generation_repo.get()
+        ttl = None if target_date.year < date.today().year else settings.cache_ttl
+        return await result_cache.get_or_load(
+            f"plans_performance:json:{generation}:{target_date.isoformat()}",
+            ttl,
+            lambda: self._load(target_date, generation),
+        )
 
-        plans = await self.repo.get_plans_for_period(target_date)
-        data = []
-        for plan in plans:
-            period_start = plan.period.replace(day=1)
-            last_day = plan.period.replace(
-                day=calendar.monthrange(plan.period.year, plan.period.month)[1]
-            )
-            period_to = min(last_day, target_date)
-
-            actual_sum = await self.repo.get_actual_sum(
-                plan.category, period_start, period_to
-            )
-            percent = float(actual_sum) / float(plan.sum) * 100 if plan.sum else 0.0
-
-            data.append(
-                dict(
-                    period=str(plan.period),
-                    category=plan.category,
-                    plan_sum=plan.sum,
-                    fact_sum=actual_sum,
-                    percent=round(percent, 2),
-                )
-            )
-        return data
+    async def _load(self, target_date: date, generation: int) -> bytes:
+        registry = await dictionary_registry.ensure_loaded(self.session, generation)
+        category_ids = registry.id_of(ISSUANCE), registry.id_of(COLLECTION)
+        if analytics_engine.enabled:
+            engine = await analytics_engine.ensure_current(self.session, generation)
+            rows = engine.plan_performance(target_date, *category_ids)
+        else:
+            rows = await self.repo.get_performance(target_date, *category_ids)
+        return plan_performance_adapter.dump_json(
+            plan_performance_adapter.validate_python(list(rows), from_attributes=True)
+        )
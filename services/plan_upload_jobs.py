@@ -0,0 +1,192 @@
+import asyncio
+import os
+import shutil
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.status import HTTP_404_NOT_FOUND
+
+from core.config import settings
+from db.connection import async_session_maker
+from db.plan_upload_job_model import PlanUploadJob
+from logs.config.logging_config import logger
+from repo.plan_upload_job_repo import (
+    FAILED,
+    INSERTING,
+    SUCCEEDED,
+    PlanUploadJobRepo,
+)
+from services.plan_insert_service import PlanService
+
+
+class PlanUploadJobService:
+    def __init__(self, session: AsyncSession):
+        self.repo = PlanUploadJobRepo(session)
+
+    async def create_job(
+        self, file: BinaryIO, filename: Optional[str]
+    ) -> PlanUploadJob:
+        """Spools the upload to disk and queues it, the file is parsed later."""
+        os.makedirs(settings.plan_upload_dir, exist_ok=True)
+        extension = os.path.splitext(filename or "")[1].lower()
+        path = os.path.join(settings.plan_upload_dir, f"{uuid.uuid4().hex}{extension}")
+        await asyncio.get_running_loop().run_in_executor(None, spool, file, path)
+        job = await self.repo.create(filename, path)
+        plan_upload_workers.submit(job.id)
+        return job
+
+    async def get_job(self, job_id: int) -> PlanUploadJob:
+        job = await self.repo.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Job not found.")
+        return job
+
+
+def spool(file: BinaryIO, path: str) -> None:
+    with open(path, "wb") as out:
+        shutil.copyfileobj(file, out)
+
+
+class PlanUploadWorkers:
+    """
+    In-process workers running queued plan uploads through `PlanService`. Jobs live
+    in `plan_upload_jobs`, so any process can report on them. A job is claimed with a
+    conditional update before it runs and carries its owner's heartbeat while it
+    does. A periodic sweep queues again the jobs whose heartbeat stopped for
+    `plan_upload_stale_after`, and a restarted process takes back its own at once.
+    """
+
+    def __init__(self, workers: int, owner: str):
+        self.workers = workers
+        self.owner = owner
+        self._queue: asyncio.Queue[int] = asyncio.Queue()
+        self._queued: set[int] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        try:
+            # whatever this process ran before a restart is not running anymore
+            async with async_session_maker() as session:
+                requeued = await PlanUploadJobRepo(session).requeue_owned(self.owner)
+            if requeued:
+                logger.warning(f"Requeued {requeued} interrupted plan upload jobs")
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not resume plan upload jobs: {e}")
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"plan-upload-{i}")
+            for i in range(self.workers)
+        ]
+        self._tasks.append(
+            asyncio.create_task(self._sweep_forever(), name="plan-upload-sweep")
+        )
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            try:
+                await self._sweep()
+            except SQLAlchemyError as e:
+                logger.warning(f"Could not sweep plan upload jobs: {e}")
+            await asyncio.sleep(settings.plan_upload_sweep_interval)
+
+    async def _sweep(self) -> None:
+        async with async_session_maker() as session:
+            repo = PlanUploadJobRepo(session)
+            stale_before = datetime.now() - timedelta(
+                seconds=settings.plan_upload_stale_after
+            )
+            requeued = await repo.requeue_stale(stale_before)
+            if requeued:
+                logger.warning(f"Requeued {requeued} stale plan upload jobs")
+            # queued by another process that stopped before running them too
+            for job_id in await repo.get_queued_ids():
+                self.submit(job_id)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job_id: int) -> None:
+        if job_id not in self._queued:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self.run(job_id)
+            except Exception as e:
+                logger.error(f"Plan upload job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def run(self, job_id: int) -> None:
+        async with async_session_maker() as session:
+            repo = PlanUploadJobRepo(session)
+            if not await repo.claim(job_id, self.owner):
+                return
+            job = await repo.get(job_id)
+            path, filename = job.path, job.filename
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            await self._process(job_id, path, filename)
+        finally:
+            heartbeat.cancel()
+        # kept when cancelled, so a requeued job still finds its file
+        if os.path.exists(path):
+            os.remove(path)
+
+    async def _process(self, job_id: int, path: str, filename: Optional[str]) -> None:
+        try:
+            async with async_session_maker() as session:
+                service = PlanService(session)
+                with open(path, "rb") as file:
+                    plans = await service.prepare_plans(file, filename)
+                await self._set(job_id, status=INSERTING, total_rows=len(plans))
+                inserted = await service.insert_plans(
+                    plans,
+                    on_progress=lambda rows: self._set(job_id, processed_rows=rows),
+                )
+        except HTTPException as e:
+            await self._set(job_id, status=FAILED, error=str(e.detail))
+        except Exception as e:
+            logger.error(f"Plan upload job {job_id} failed: {e}")
+            await self._set(job_id, status=FAILED, error="Unexpected error")
+        else:
+            await self._set(job_id, status=SUCCEEDED, inserted_rows=inserted)
+
+    async def _heartbeat(self, job_id: int) -> None:
+        # parsing runs in the parse pool, so this keeps beating while a file validates
+        while True:
+            await asyncio.sleep(settings.plan_upload_heartbeat_interval)
+            try:
+                async with async_session_maker() as session:
+                    alive = await PlanUploadJobRepo(session).heartbeat(
+                        job_id, self.owner
+                    )
+            except SQLAlchemyError as e:
+                logger.warning(f"Plan upload job {job_id} missed a heartbeat: {e}")
+                continue
+            if not alive:
+                logger.warning(f"Plan upload job {job_id} was requeued while running")
+                return
+
+    async def _set(self, job_id: int, **values) -> None:
+        # a session of its own, progress commits while the insert is still open
+        async with async_session_maker() as session:
+            await PlanUploadJobRepo(session).set(job_id, self.owner, **values)
+
+
+# stable across restarts of a container, where the app runs as the same pid
+plan_upload_workers = PlanUploadWorkers(
+    settings.plan_upload_workers, f"{socket.gethostname()}:{os.getpid()}"[:64]
+)
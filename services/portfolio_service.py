@@ -0,0 +1,66 @@
+from datetime import date
+from decimal import Decimal
+
+from core.cache import result_cache
+from core.config import settings
+from repo.data_generation_repo import DataGenerationRepo
+from repo.portfolio_repo import PortfolioRepo
+from schemas.portfolio_schema import (
+    AgingBucket,
+    PortfolioAgingResponse,
+    portfolio_aging_adapter,
+)
+from services.dictionary_registry import BODY, PERCENT, dictionary_registry
+
+# (label, first day overdue, last day overdue), not yet due counts as 0 days
+AGING_BUCKETS = (
+    ("0-30", 0, 30),
+    ("31-90", 31, 90),
+    ("91-180", 91, 180),
+    ("180+", 181, None),
+)
+
+
+class PortfolioService:
+    def __init__(self, session):
+        self.session = session
+        self.repo = PortfolioRepo(session)
+        self.generation_repo = DataGenerationRepo(session)
+
+    async def get_aging(self, as_of: date) -> bytes:
+        generation = await self.generation_repo.get()
+        ttl = None if as_of < date.today() else settings.cache_ttl
+        return await result_cache.get_or_load(
+            f"portfolio_aging:json:{generation}:{as_of.isoformat()}",
+            ttl,
+            lambda: self._load(as_of, generation),
+        )
+
+    async def _load(self, as_of: date, generation: int) -> bytes:
+        registry = await dictionary_registry.ensure_loaded(self.session, generation)
+        rows = await self.repo.get_aging(
+            as_of,
+            registry.id_of(BODY),
+            registry.id_of(PERCENT),
+            [start for _, start, _ in AGING_BUCKETS],
+        )
+        by_bucket = {row.bucket: row for row in rows}
+        buckets = []
+        # every bucket is reported, empty ones with zeros
+        for index, (label, start, end) in enumerate(AGING_BUCKETS):
+            row = by_bucket.get(index)
+            buckets.append(
+                AgingBucket(
+                    bucket=label,
+                    min_days_overdue=start,
+                    max_days_overdue=end,
+                    credits_count=row.credits_count if row else 0,
+                    outstanding_body=row.outstanding_body if row else Decimal("0.00"),
+                    outstanding_percent=(
+                        row.outstanding_percent if row else Decimal("0.00")
+                    ),
+                )
+            )
+        return portfolio_aging_adapter.dump_json(
+            PortfolioAgingResponse(as_of=as_of, buckets=buckets), exclude_none=True
+        )
@@ -1,58 +1,184 @@
 from decimal import Decimal
+from itertools import batched, groupby
+from typing import AsyncIterator, Optional, Sequence
 
 
+import pyarrow as pa
 from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.arrow import ipc_stream
+from core.config import settings
+from db.connection import read_session
 from repo.user_credits_repo import UserCreditRepo
-from schemas.credits_info_schema import CreditInfo, UserCreditsRes
+from schemas.credits_info_schema import (
+    CreditInfo,
+    UserCreditsBatchReq,
+    UserCreditsRes,
+    user_credits_adapter,
+    user_credits_arrow_schema,
+)
 from datetime import date
 
 
 class UserCreditService:
     def __init__(self, session: AsyncSession):
+        self.session = session
         self.repo = UserCreditRepo(session)
 
-    async def get_all_user_credits(self, user_id: int):
+    async def get_all_user_credits(
+        self, user_id: int, after: Optional[int] = None, limit: Optional[int] = None
+    ) -> bytes:
+        await self._check_user_exists(user_id)
+        # one extra row tells whether another page follows
+        credit_rows = await self.repo.get_user_credits(
+            user_id,
+            after_credit_id=after,
+            limit=None if limit is None else limit + 1,
+        )
+        next_cursor = None
+        if limit is not None and len(credit_rows) > limit:
+            credit_rows = credit_rows[:limit]
+            next_cursor = credit_rows[-1].credit_id
+        today = date.today()
+        credits_list = [self._credit_to_schema(row, today) for row in credit_rows]
+        return user_credits_adapter.dump_json(
+            UserCreditsRes(
+                user_id=user_id, credits=credits_list, next_cursor=next_cursor
+            ),
+            exclude_none=True,
+        )
+
+    async def stream_user_credits(
+        self, user_id: int, after: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        await self._check_user_exists(user_id)
+        return self._user_credits_stream(user_id, after, date.today())
+
+    async def _user_credits_stream(
+        self,
+        user_id: int,
+        after: Optional[int],
+        today: date,
+    ) -> AsyncIterator[str]:
+        # Same document as get_all_user_credits, written one cursor batch at a time.
+        async with read_session() as session:
+            result = await UserCreditRepo(session).stream_user_credits(
+                user_id, after_credit_id=after
+            )
+            yield f'{{"user_id": {user_id}, "credits": ['
+            separator = ""
+            async for rows in result.partitions():
+                yield separator + ", ".join(
+                    self._to_json(self._credit_to_schema(row, today)) for row in rows
+                )
+                separator = ", "
+            yield "]}"
+
+    async def _check_user_exists(self, user_id: int) -> None:
         is_user_exists = await self.repo.is_user_exists(user_id)
         if not is_user_exists:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
             )
-        body_payment_type_id = await self.repo.get_payment_type_id("тіло")
-        percent_payment_type_id = await self.repo.get_payment_type_id("відсотки")
-        if body_payment_type_id is None or percent_payment_type_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Payment types 'тіло' or 'відсотки' not found in dictionary.",
-            )
-        all_credits = await self.repo.get_user_credits(user_id)
-        credits_list = [
-            await self._credit_to_schema(
-                credit, body_payment_type_id, percent_payment_type_id
-            )
-            for credit in all_credits
-        ]
-        return UserCreditsRes(user_id=user_id, credits=credits_list).model_dump(
-            exclude_none=True
+
+    async def stream_users_credits(
+        self, batch: UserCreditsBatchReq
+    ) -> AsyncIterator[str]:
+        return self._users_credits_lines(
+            self._users_credits_chunks(batch), date.today()
         )
 
-    async def _credit_to_schema(
-        self, credit, body_payment_type_id, percent_payment_type_id
-    ):
-        closed = credit.actual_return_date is not None
+    async def stream_users_credits_arrow(
+        self, batch: UserCreditsBatchReq
+    ) -> AsyncIterator[bytes]:
+        return ipc_stream(
+            user_credits_arrow_schema,
+            self._users_credits_batches(
+                self._users_credits_chunks(batch), date.today()
+            ),
+        )
+
+    async def _users_credits_chunks(
+        self, batch: UserCreditsBatchReq
+    ) -> AsyncIterator[tuple[list[int], Sequence[Row]]]:
+        """Existing user ids of the batch with their credit rows, chunk by chunk."""
+        # The stream outlives the request dependencies, so it owns its session.
+        batch_size = settings.user_credits_batch_size
+        async with read_session() as session:
+            repo = UserCreditRepo(session)
+
+            if batch.user_ids is not None:
+                for chunk in batched(sorted(set(batch.user_ids)), batch_size):
+                    user_ids = await repo.get_existing_user_ids(chunk)
+                    yield user_ids, await repo.get_users_credits(user_ids)
+                return
+
+            from_user_id = batch.from_user_id
+            while from_user_id <= batch.to_user_id:
+                user_ids = await repo.get_user_ids_in_range(
+                    from_user_id, batch.to_user_id, batch_size
+                )
+                if not user_ids:
+                    break
+                yield user_ids, await repo.get_users_credits(user_ids)
+                from_user_id = user_ids[-1] + 1
+
+    async def _users_credits_lines(
+        self,
+        chunks: AsyncIterator[tuple[list[int], Sequence[Row]]],
+        today: date,
+    ) -> AsyncIterator[str]:
+        async for user_ids, credit_rows in chunks:
+            credits_by_user = {
+                user_id: [self._credit_to_schema(row, today) for row in rows]
+                for user_id, rows in groupby(credit_rows, key=lambda row: row.user_id)
+            }
+            for user_id in user_ids:
+                res = UserCreditsRes(
+                    user_id=user_id, credits=credits_by_user.get(user_id, [])
+                )
+                yield self._to_json(res) + "\n"
+
+    async def _users_credits_batches(
+        self,
+        chunks: AsyncIterator[tuple[list[int], Sequence[Row]]],
+        today: date,
+    ) -> AsyncIterator[pa.RecordBatch]:
+        async for _, credit_rows in chunks:
+            if not credit_rows:
+                continue
+            yield pa.RecordBatch.from_pylist(
+                [
+                    {
+                        "user_id": row.user_id,
+                        **self._credit_to_schema(row, today).model_dump(),
+                    }
+                    for row in credit_rows
+                ],
+                schema=user_credits_arrow_schema,
+            )
+
+    @staticmethod
+    def _to_json(model: BaseModel) -> str:
+        return model.model_dump_json(exclude_none=True)
+
+    @staticmethod
+    def _credit_to_schema(row, today: date) -> CreditInfo:
+        closed = row.actual_return_date is not None
 
         if closed:
             # close credit
-            total_payments = await self.repo.get_credit_total_payments(credit.id)
             return CreditInfo(
-                credit_id=credit.id,
-                issuance_date=credit.issuance_date,
+                credit_id=row.credit_id,
+                issuance_date=row.issuance_date,
                 closed=True,
-                actual_return_date=credit.actual_return_date,
-                body=Decimal(credit.body or 0),
-                percent=Decimal(credit.percent or 0),
-                total_payments=Decimal(total_payments),
+                actual_return_date=row.actual_return_date,
+                body=Decimal(row.body or 0),
+                percent=Decimal(row.percent or 0),
+                total_payments=Decimal(row.total_payments),
                 return_date=None,
                 days_overdue=None,
                 body_payments=None,
@@ -60,27 +186,20 @@ class UserCreditService:
             )
         else:
             # open credit
-            return_date = credit.return_date
-            today = date.today()
+            return_date = row.return_date
             days_overdue = (
                 (today - return_date).days if return_date and today > return_date else 0
             )
-            body_payments = await self.repo.get_credit_payments_by_type(
-                credit.id, body_payment_type_id
-            )
-            percent_payments = await self.repo.get_credit_payments_by_type(
-                credit.id, percent_payment_type_id
-            )
             return CreditInfo(
-                credit_id=credit.id,
-                issuance_date=credit.issuance_date,
+                credit_id=row.credit_id,
+                issuance_date=row.issuance_date,
                 closed=False,
                 actual_return_date=None,
-                body=Decimal(credit.body or 0),
-                percent=Decimal(credit.percent or 0),
+                body=Decimal(row.body or 0),
+                percent=Decimal(row.percent or 0),
                 total_payments=None,
                 return_date=return_date,
                 days_overdue=days_overdue,
-                body_payments=Decimal(body_payments),
-                percent_payments=Decimal(percent_payments),
+                body_payments=Decimal(row.body_payments),
+                percent_payments=Decimal(row.percent_payments),
             )
@@ -1,9 +1,128 @@
-from repo.plan_repo import PlanRepo
+from datetime import date
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.status import HTTP_400_BAD_REQUEST
+
+from core.arrow import ResponseFormat, to_ipc_stream
+from core.cache import result_cache
+from core.config import settings
+from repo.data_generation_repo import DataGenerationRepo
+from repo.plan_repo import PlanRepo, YearMonth
+from schemas.plan_performance_schema import (
+    YearPerformanceRangeResponse,
+    year_performance_adapter,
+    year_performance_arrow_schema,
+    year_performance_range_adapter,
+)
+from services.analytics_engine import analytics_engine
+from services.dictionary_registry import COLLECTION, ISSUANCE, dictionary_registry
 
 
 class YearPerformanceService:
     def __init__(self, session):
+        self.session = session
         self.repo = PlanRepo(session)
+        self.generation_repo = DataGenerationRepo(session)
+
+    async def get_year_performance(
+        self,
+        year: int,
+        limit: int = 12,
+        offset: int = 0,
+        response_format: ResponseFormat = "json",
+    ) -> bytes:
+        generation = await self.generation_repo.get()
+        # past years only change through a load, which bumps the generation anyway
+        ttl = None if year < date.today().year else settings.cache_ttl
+        return await result_cache.get_or_load(
+            f"year_performance:{response_format}:{generation}:{year}:{limit}:{offset}",
+            ttl,
+            lambda: self._load(year, limit, offset, generation, response_format),
+        )
+
+    async def _category_ids(self, generation: int) -> tuple[int, int]:
+        registry = await dictionary_registry.ensure_loaded(self.session, generation)
+        return registry.id_of(ISSUANCE), registry.id_of(COLLECTION)
+
+    async def _load(
+        self,
+        year: int,
+        limit: int,
+        offset: int,
+        generation: int,
+        response_format: ResponseFormat,
+    ) -> bytes:
+        category_ids = await self._category_ids(generation)
+        if analytics_engine.enabled:
+            engine = await analytics_engine.ensure_current(self.session, generation)
+            rows = engine.year_stats(
+                (year, 1), (year, 12), *category_ids, limit=limit, offset=offset
+            )
+        else:
+            rows = await self.repo.get_stats(
+                year, *category_ids, limit=limit, offset=offset
+            )
+        items = year_performance_adapter.validate_python(
+            list(rows), from_attributes=True
+        )
+        if response_format == "arrow":
+            return to_ipc_stream(
+                year_performance_arrow_schema, (item.model_dump() for item in items)
+            )
+        return year_performance_adapter.dump_json(items)
+
+    async def get_range_performance(
+        self,
+        from_month: YearMonth,
+        to_month: YearMonth,
+        after: Optional[YearMonth] = None,
+        limit: int = 120,
+    ) -> bytes:
+        if from_month > to_month:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="The start of the range must not be after its end",
+            )
+        generation = await self.generation_repo.get()
+        ttl = None if to_month[0] < date.today().year else settings.cache_ttl
+        return await result_cache.get_or_load(
+            f"year_range:json:{generation}:{from_month}:{to_month}:{after}:{limit}",
+            ttl,
+            lambda: self._load_range(from_month, to_month, after, limit, generation),
+        )
 
-    async def get_year_performance(self, year: int, limit: int = 12, offset: int = 0):
-        return await self.repo.get_stats(year, limit=limit, offset=offset)
+    async def _load_range(
+        self,
+        from_month: YearMonth,
+        to_month: YearMonth,
+        after: Optional[YearMonth],
+        limit: int,
+        generation: int,
+    ) -> bytes:
+        # one extra row tells whether another page follows
+        category_ids = await self._category_ids(generation)
+        if analytics_engine.enabled:
+            engine = await analytics_engine.ensure_current(self.session, generation)
+            rows = engine.year_stats(
+                from_month, to_month, *category_ids, after=after, limit=limit + 1
+            )
+        else:
+            rows = list(
+                await self.repo.get_stats_range(
+                    from_month, to_month, *category_ids, after=after, limit=limit + 1
+                )
+            )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1].year:04d}-{rows[-1].month:02d}"
+        return year_performance_range_adapter.dump_json(
+            YearPerformanceRangeResponse(
+                items=year_performance_adapter.validate_python(
+                    rows, from_attributes=True
+                ),
+                next_cursor=next_cursor,
+            ),
+            exclude_none=True,
+        )
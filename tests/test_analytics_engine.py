@@ -0,0 +1,199 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from decimal import Decimal
+
+# settings are read on import, the tests never reach MySQL
+for name in ("MYSQL_USER", "MYSQL_PASSWORD", "MYSQL_DATABASE", "MYSQL_ROOT_PASSWORD"):
+    os.environ.setdefault(name, "test")
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from db.connection import Base
+from db.credits_model import Credit
+from db.dictionary_model import Dictionary
+from db.payments_model import Payment
+from db.plans_model import Plan
+from db.users_model import User
+import db.rollups_model  # noqa: F401
+from repo.plan_repo import PlanRepo
+from repo.rollup_repo import RollupRepo
+from services.analytics_engine import AnalyticsEngine, YearStatsRow
+
+ISSUANCE_ID, COLLECTION_ID, BODY_ID = 3, 4, 1
+
+
+def normalize(row, fields) -> dict:
+    values = row._asdict()
+    return {
+        field: (
+            round(float(values[field]), 2)
+            if isinstance(values[field], (Decimal, float))
+            else str(values[field])
+        )
+        for field in fields
+    }
+
+
+class AnalyticsEngineTest(unittest.IsolatedAsyncioTestCase):
+    """The engine against the SQL path of `PlanRepo` on a small SQLite ledger."""
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'test.db')}"
+        )
+        self.session_maker = async_sessionmaker(self.db_engine, expire_on_commit=False)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await self.insert(
+            Dictionary,
+            [
+                {"id": BODY_ID, "name": "тіло"},
+                {"id": ISSUANCE_ID, "name": "видача"},
+                {"id": COLLECTION_ID, "name": "збір"},
+            ],
+        )
+        await self.insert(
+            User, [{"id": 1, "login": "user", "registration_date": date(2023, 1, 1)}]
+        )
+        await self.insert(
+            Plan,
+            [
+                self.plan(1, date(2024, 1, 1), ISSUANCE_ID, 4000),
+                self.plan(2, date(2024, 2, 1), ISSUANCE_ID, 3000),
+                self.plan(3, date(2024, 1, 1), COLLECTION_ID, 1000),
+                self.plan(4, date(2024, 2, 1), COLLECTION_ID, 1500),
+            ],
+        )
+        await self.insert(
+            Credit,
+            [
+                self.credit(1, date(2024, 1, 10), 1000),
+                self.credit(2, date(2024, 2, 5), 1000),
+                self.credit(4, date(2024, 2, 20), 2000),
+            ],
+        )
+        await self.insert(
+            Payment,
+            [
+                self.payment(1, 1, date(2024, 1, 20), 500),
+                self.payment(3, 2, date(2024, 2, 10), 500),
+            ],
+        )
+
+    async def asyncTearDown(self):
+        await self.db_engine.dispose()
+        self.tmp.cleanup()
+
+    @staticmethod
+    def plan(plan_id: int, period: date, category_id: int, amount: int) -> dict:
+        return {
+            "id": plan_id,
+            "period": period,
+            "category_id": category_id,
+            "sum": Decimal(amount),
+        }
+
+    @staticmethod
+    def credit(credit_id: int, issuance_date: date, body: int) -> dict:
+        return {
+            "id": credit_id,
+            "user_id": 1,
+            "issuance_date": issuance_date,
+            "body": Decimal(body),
+            "percent": Decimal(0),
+        }
+
+    @staticmethod
+    def payment(payment_id: int, credit_id: int, payment_date: date, amount: int):
+        return {
+            "id": payment_id,
+            "credit_id": credit_id,
+            "payment_date": payment_date,
+            "type_id": BODY_ID,
+            "sum": Decimal(amount),
+        }
+
+    async def insert(self, model, rows: list[dict]) -> None:
+        # the SQL path reads the rollups, which the loader keeps next to the rows
+        async with self.session_maker() as session:
+            await session.execute(insert(model), rows)
+            await RollupRepo(session).rebuild()
+            await session.commit()
+
+    async def assert_matches_sql(self, engine: AnalyticsEngine, generation: int):
+        async with self.session_maker() as session:
+            await engine.ensure_current(session, generation)
+            repo = PlanRepo(session)
+            sql_stats = await repo.get_stats(2024, ISSUANCE_ID, COLLECTION_ID)
+            sql_performance = await repo.get_performance(
+                date(2024, 1, 31), ISSUANCE_ID, COLLECTION_ID
+            )
+
+        stats = engine.year_stats((2024, 1), (2024, 12), ISSUANCE_ID, COLLECTION_ID)
+        fields = YearStatsRow._fields
+        self.assertEqual(
+            [normalize(row, fields) for row in stats],
+            [normalize(row, fields) for row in sql_stats],
+        )
+        performance = engine.plan_performance(
+            date(2024, 1, 31), ISSUANCE_ID, COLLECTION_ID
+        )
+        fields = ("category", "plan_sum", "fact_sum", "percent")
+        self.assertEqual(
+            sorted(normalize(row, fields).items() for row in performance),
+            sorted(normalize(row, fields).items() for row in sql_performance),
+        )
+        return stats
+
+    async def test_rows_committed_below_the_last_loaded_id(self):
+        engine = AnalyticsEngine(enabled=True)
+        stats = await self.assert_matches_sql(engine, generation=1)
+        self.assertEqual([row.issuance_count for row in stats], [1, 2])
+
+        # chunks of a concurrent load committing out of order
+        await self.insert(Credit, [self.credit(3, date(2024, 1, 15), 1000)])
+        await self.insert(Payment, [self.payment(2, 4, date(2024, 2, 11), 1000)])
+
+        stats = await self.assert_matches_sql(engine, generation=2)
+        self.assertEqual([row.issuance_count for row in stats], [2, 2])
+        self.assertEqual([row.collection_count for row in stats], [1, 2])
+
+    async def test_deleted_rows(self):
+        engine = AnalyticsEngine(enabled=True)
+        await self.assert_matches_sql(engine, generation=1)
+
+        async with self.session_maker() as session:
+            await session.execute(Payment.__table__.delete().where(Payment.id == 1))
+            await RollupRepo(session).rebuild()
+            await session.commit()
+
+        stats = await self.assert_matches_sql(engine, generation=2)
+        self.assertEqual([row.collection_count for row in stats], [0, 1])
+
+    async def test_replica_behind_the_loaded_generation(self):
+        # a copy taken before the next load stands in for a replica lagging behind
+        replica_path = os.path.join(self.tmp.name, "replica.db")
+        shutil.copy(os.path.join(self.tmp.name, "test.db"), replica_path)
+        replica_engine = create_async_engine(f"sqlite+aiosqlite:///{replica_path}")
+        replica_session_maker = async_sessionmaker(
+            replica_engine, expire_on_commit=False
+        )
+        await self.insert(Credit, [self.credit(3, date(2024, 1, 15), 1000)])
+
+        engine = AnalyticsEngine(enabled=True)
+        await self.assert_matches_sql(engine, generation=2)
+        async with replica_session_maker() as session:
+            await engine.ensure_current(session, generation=1)
+        await replica_engine.dispose()
+
+        stats = engine.year_stats((2024, 1), (2024, 12), ISSUANCE_ID, COLLECTION_ID)
+        self.assertEqual([row.issuance_count for row in stats], [2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()